@@ -1,6 +1,8 @@
 import json
 import random
 
+from catalog import load_records
+
 # 游戏分类
 categories = ["Action", "Racing", "Shooting", "Puzzle", "Sports", "Casual"]
 
@@ -15,8 +17,7 @@ tags_by_category = {
 }
 
 # 读取游戏数据
-with open('game_data.json', 'r', encoding='utf-8') as f:
-    games = json.load(f)
+games = load_records('game_data.json')
 
 # 添加分类和标签
 for game in games:
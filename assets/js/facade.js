@@ -0,0 +1,23 @@
+// 游戏详情页: 点击缩略图或"Play Game"按钮后才创建游戏iframe, 打开详情页时不加载第三方游戏
+(function () {
+    var facade = document.querySelector('.game-facade');
+    if (!facade) return;
+    function play() {
+        if (facade.querySelector('iframe')) return;
+        var iframe = document.createElement('iframe');
+        iframe.src = facade.getAttribute('data-src');
+        iframe.width = facade.getAttribute('data-width');
+        iframe.height = facade.getAttribute('data-height');
+        iframe.setAttribute('frameborder', '0');
+        iframe.setAttribute('scrolling', 'none');
+        iframe.setAttribute('allow', 'autoplay; fullscreen');
+        iframe.setAttribute('allowfullscreen', '');
+        facade.innerHTML = '';
+        facade.appendChild(iframe);
+        facade.classList.add('playing');
+    }
+    facade.addEventListener('click', play);
+    document.querySelectorAll('a[href="#game-iframe"]').forEach(function (link) {
+        link.addEventListener('click', play);
+    });
+})();
@@ -0,0 +1,56 @@
+// 首页无限滚动: 滚动到底部时依次加载预先生成的卡片HTML片段(列在网格的data-fragments属性中)
+// 不支持脚本的浏览器和搜索引擎仍然使用pageN.html分页
+(function () {
+    var grid = document.querySelector('[data-fragments]');
+    if (!grid || !window.fetch || !('IntersectionObserver' in window)) return;
+
+    var queue = grid.getAttribute('data-fragments').split(/\s+/).filter(Boolean);
+    if (!queue.length) return;
+
+    // 接管后隐藏底部的分页导航, 加载失败时恢复
+    var pagers = document.querySelectorAll('.pagination');
+    var bottomPager = pagers.length > 1 ? pagers[pagers.length - 1] : null;
+    if (bottomPager) bottomPager.hidden = true;
+
+    var sentinel = document.createElement('div');
+    sentinel.style.height = '1px';
+    grid.parentNode.insertBefore(sentinel, grid.nextSibling);
+
+    var loading = false;
+    var observer = new IntersectionObserver(function (entries) {
+        if (entries[0].isIntersecting) loadNext();
+    }, {rootMargin: '600px 0px'});
+
+    function stop() {
+        observer.disconnect();
+        sentinel.parentNode.removeChild(sentinel);
+    }
+
+    function loadNext() {
+        if (loading) return;
+        if (!queue.length) {
+            stop();
+            return;
+        }
+        loading = true;
+        fetch(queue[0])
+            .then(function (response) {
+                if (!response.ok) throw new Error('HTTP ' + response.status);
+                return response.text();
+            })
+            .then(function (html) {
+                queue.shift();
+                grid.insertAdjacentHTML('beforeend', html);
+                loading = false;
+                // 重新观察: 插入后哨兵仍在可视范围内时继续加载下一页
+                observer.unobserve(sentinel);
+                observer.observe(sentinel);
+            })
+            .catch(function () {
+                stop();
+                if (bottomPager) bottomPager.hidden = false;
+            });
+    }
+
+    observer.observe(sentinel);
+})();
@@ -0,0 +1,113 @@
+// 站内搜索: 只下载输入词前缀对应的索引分片(assets/search/<前缀>.json), 在浏览器中排序结果
+(function () {
+    var PREFIX_LENGTH = 2;
+    var MAX_RESULTS = 20;
+    var EMPTY_SHARD = {docs: {}, tokens: {}};
+
+    function toSet(words) {
+        var set = {};
+        words.split(' ').forEach(function (word) { set[word] = true; });
+        return set;
+    }
+
+    // 建索引时忽略的词(与 search_index.py 的 STOPWORDS 相同, 构建时检查), 搜索时同样忽略
+    var STOPWORDS = toSet('a all also an and any are as at be but by can each every for from get gets has have how in into is it its just like more most new of on one only or our out over own same so than that the their them then there these they this to two up very was we were what when where which while who will with you your yours');
+
+    var input = document.getElementById('site-search');
+    var results = document.getElementById('search-results');
+    if (!input || !results) return;
+
+    // 脚本位于 assets/js/ 下, 由此得到网站根目录
+    var root = new URL('../../', document.currentScript.src);
+    var shards = {};
+    var latestQuery = '';
+    var timer = null;
+
+    function tokenize(text) {
+        return (text.toLowerCase().match(/[a-z0-9]+/g) || []).filter(function (term) {
+            return term.length >= PREFIX_LENGTH && !STOPWORDS.hasOwnProperty(term);
+        });
+    }
+
+    function loadShard(prefix) {
+        if (!shards[prefix]) {
+            shards[prefix] = fetch(new URL('assets/search/' + prefix + '.json', root))
+                .then(function (response) { return response.ok ? response.json() : EMPTY_SHARD; })
+                .catch(function () { return EMPTY_SHARD; });
+        }
+        return shards[prefix];
+    }
+
+    // 一个搜索词的匹配结果: 以该词开头的所有索引词, 完全匹配的分数加倍
+    function matchTerm(term) {
+        return loadShard(term.slice(0, PREFIX_LENGTH)).then(function (shard) {
+            var scores = {};
+            Object.keys(shard.tokens).forEach(function (token) {
+                if (token.lastIndexOf(term, 0) !== 0) return;
+                var factor = token === term ? 2 : 1;
+                shard.tokens[token].forEach(function (posting) {
+                    var score = posting[1] * factor;
+                    if (!(scores[posting[0]] >= score)) scores[posting[0]] = score;
+                });
+            });
+            return {scores: scores, docs: shard.docs};
+        });
+    }
+
+    // 所有搜索词都要匹配, 按总分排序
+    function search(query) {
+        var terms = tokenize(query);
+        if (!terms.length) return Promise.resolve([]);
+        return Promise.all(terms.map(matchTerm)).then(function (matches) {
+            var docs = {};
+            var total = null;
+            matches.forEach(function (match) {
+                var next = {};
+                Object.keys(match.scores).forEach(function (id) {
+                    if (total === null || id in total) next[id] = (total ? total[id] : 0) + match.scores[id];
+                });
+                Object.keys(match.docs).forEach(function (id) { docs[id] = match.docs[id]; });
+                total = next;
+            });
+            return Object.keys(total).map(function (id) {
+                return {doc: docs[id], score: total[id]};
+            }).sort(function (a, b) {
+                return b.score - a.score || a.doc[1].localeCompare(b.doc[1]);
+            }).slice(0, MAX_RESULTS);
+        });
+    }
+
+    function render(query, hits) {
+        results.innerHTML = '';
+        if (!query) return;
+        if (!hits.length) {
+            var empty = document.createElement('p');
+            empty.className = 'search-empty';
+            empty.textContent = 'No games found';
+            results.appendChild(empty);
+            return;
+        }
+        hits.forEach(function (hit) {
+            var link = document.createElement('a');
+            link.className = 'search-result';
+            link.href = new URL('games/' + hit.doc[0] + '.html', root).href;
+            link.textContent = hit.doc[1];
+            var category = document.createElement('span');
+            category.textContent = hit.doc[2];
+            link.appendChild(category);
+            results.appendChild(link);
+        });
+    }
+
+    input.addEventListener('input', function () {
+        clearTimeout(timer);
+        timer = setTimeout(function () {
+            var query = input.value.trim();
+            latestQuery = query;
+            search(query).then(function (hits) {
+                // 忽略已过期的搜索结果
+                if (query === latestQuery) render(query, hits);
+            });
+        }, 150);
+    });
+})();
@@ -1,29 +1,55 @@
 import os
 import json
-import shutil
 import re
+import posixpath
+import hashlib
+import argparse
+import time
+import multiprocessing
+from collections import Counter, namedtuple
 from datetime import datetime
+from functools import lru_cache
 
-# Define category mapping (English)
-CATEGORY_MAP = {
-    "Action": "Action",
-    "Racing": "Racing",
-    "Shooting": "Shooting",
-    "Puzzle": "Puzzle",
-    "Sports": "Sports",
-    "Casual": "Casual",
-    ".io": ".IO Games",
-    "Clicker": "Clicker",
-    "Adventure": "Adventure",
-    "Driving": "Driving",
-    "Beauty": "Beauty",
-    "Other": "Other"
-}
+from catalog import CATALOG_FILES, CATEGORY_MAP, SlugIndex, file_sha256, find_catalog, iter_games
+from responsive import image_dimensions, responsive_image
+from search_index import SEARCH_DIR, SEARCH_SCRIPT, STOPWORDS, SearchIndex, script_stopwords, shard_path
+from precompress import SIBLING_EXTENSIONS, precompress, print_size_report, remove_siblings, sibling_extensions
+from thumbnails import (FAILED, PROCESSED, REUSED, THUMBNAIL_SIZES, DirectoryFetcher, FetchError, HttpFetcher,
+                        ThumbnailPipeline, available as thumbnails_available)
+
+# 构建器版本: 修改页面生成逻辑后需要递增, 使增量构建的记录全部失效
+BUILDER_VERSION = "13"
+
+# 图片占位符(相对于网站根目录)
+PLACEHOLDER_IMAGE = "assets/images/placeholder.svg"
+PLACEHOLDER_SIZE = (512, 384)
+
+# 加内容指纹的静态资源: 页面链接到 style.<哈希>.css 等文件名, 可以永久缓存
+FINGERPRINT_ASSETS = ["assets/css/style.css", PLACEHOLDER_IMAGE, "assets/js/search.js", "assets/js/infinite-scroll.js",
+                      "assets/js/facade.js"]
+FINGERPRINT_LENGTH = 10
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# 缓存响应头配置: Netlify/Cloudflare Pages的_headers文件和nginx配置片段
+HEADERS_FILE = "_headers"
+NGINX_SNIPPET = "nginx_cache_headers.conf"
+
+# 增量构建清单文件(记录每个输出文件对应的输入哈希)
+BUILD_MANIFEST = ".build_manifest.json"
+
+# 部署清单(每个输出文件的大小和内容哈希)及与上次构建的差异
+DEPLOY_MANIFEST = ".deploy_manifest.json"
+DEPLOY_DIFF = ".deploy_diff.json"
+
+# 游戏卡片数据: 全部游戏和每个分类按页拆分的JSON(带内容哈希), 以及记录分片文件名的清单
+DATA_DIR = "assets/data"
+DATA_MANIFEST = "assets/data/manifest.json"
+CARD_DATA_FIELDS = ["slug", "title", "thumb", "category", "tags"]
 
 # Create directory if it doesn't exist
 def ensure_directory(directory):
     if not os.path.exists(directory):
-        os.makedirs(directory)
+        os.makedirs(directory, exist_ok=True)
         print(f"Created directory: {directory}")
 
 # 读取模板文件
@@ -31,44 +57,396 @@ def read_template(template_name):
     with open(f"templates/{template_name}.html", "r", encoding="utf-8") as f:
         return f.read()
 
+# 模板占位符: {{name}} 为普通变量, {{url:路径}} 为站内链接(路径相对于网站根目录)
+TEMPLATE_SLOT = re.compile(r"\{\{(\w+|url:[^{}]+)\}\}")
+LINK_SLOT_PREFIX = "url:"
+
+# 站内链接解析: 页面所在目录 + 目标路径 -> 相对链接
+@lru_cache(maxsize=None)
+def _relative_url(page_dir, target):
+    # 加了指纹的静态资源链接到带哈希的文件名
+    target = _asset_map.get(target, target)
+    return posixpath.relpath(target, page_dir or ".")
+
+# 静态资源路径 -> 带内容哈希的路径(工作进程在初始化时设置)
+_asset_map = {}
+
+def set_asset_map(asset_map):
+    global _asset_map
+    _asset_map = dict(asset_map)
+    _relative_url.cache_clear()
+
+def relative_url(page, target):
+    """Return the relative href from site page `page` to site path `target`"""
+    return _relative_url(posixpath.dirname(page), target)
+
+class CompiledTemplate:
+    """A template parsed once into literal segments, {{slot}} names and {{url:...}} links"""
+
+    def __init__(self, source):
+        self.source = source
+        # split后的列表为: 文本, 占位符, 文本, 占位符, ..., 文本
+        parts = TEMPLATE_SLOT.split(source)
+        self.literals = parts[0::2]
+        # 链接占位符记录为(None, 目标路径), 普通变量记录为(变量名, None)
+        self.slots = [(None, slot[len(LINK_SLOT_PREFIX):]) if slot.startswith(LINK_SLOT_PREFIX) else (slot, None)
+                      for slot in parts[1::2]]
+        # 预渲染的模板变体缓存, 见render_header
+        self.variants = {}
+
+    def bind(self, values, page):
+        """Return a copy with the slots in values and all links filled in for site page `page`"""
+        page_dir = posixpath.dirname(page)
+        literals = [self.literals[0]]
+        slots = []
+        for (name, target), literal in zip(self.slots, self.literals[1:]):
+            if name is None:
+                literals[-1] += _relative_url(page_dir, target) + literal
+            elif name in values:
+                literals[-1] += values[name] + literal
+            else:
+                slots.append((name, None))
+                literals.append(literal)
+        bound = CompiledTemplate.__new__(CompiledTemplate)
+        bound.source = self.source
+        bound.literals = literals
+        bound.slots = slots
+        bound.variants = {}
+        return bound
+
+    def render(self, values, page):
+        """Fill every slot in a single join, resolving links relative to site page `page`"""
+        page_dir = posixpath.dirname(page)
+        out = [self.literals[0]]
+        for (name, target), literal in zip(self.slots, self.literals[1:]):
+            # 缺少变量时抛出KeyError
+            out.append(values[name] if name is not None else _relative_url(page_dir, target))
+            out.append(literal)
+        return "".join(out)
+
+# 读取并编译模板
+def load_template(template_name):
+    return CompiledTemplate(read_template(template_name))
+
+# 侧边栏中各分类对应的激活状态占位符
+ACTIVE_SLOTS = {
+    "Action": "action_active",
+    "Racing": "racing_active",
+    "Shooting": "shooting_active",
+    "Puzzle": "puzzle_active",
+    "Sports": "sports_active",
+    "Casual": "casual_active",
+    ".io": "io_active",
+    "Clicker": "clicker_active",
+    "Adventure": "adventure_active",
+    "Driving": "driving_active",
+    "Beauty": "beauty_active",
+    "Other": "other_active"
+}
+HOME_ACTIVE_SLOT = "home_active"
+
+# 侧边栏激活状态占位符的值
+def active_values(active_slot=None):
+    values = {HOME_ACTIVE_SLOT: ""}
+    for slot in ACTIVE_SLOTS.values():
+        values[slot] = ""
+    if active_slot:
+        values[active_slot] = "active"
+    return values
+
+# 渲染页面header
+def render_header(header_template, page, title, description, header, subheader, active_slot=None):
+    """Render the header for site page `page`.
+
+    The sidebar, active-category marker and relative links only depend on the
+    active category and the page's directory (its depth below a category), so
+    that part is pre-rendered once per variant and every page only fills in
+    its own title, description, header and subheader.
+    """
+    key = (active_slot, posixpath.dirname(page))
+    variant = header_template.variants.get(key)
+    if variant is None:
+        variant = header_template.bind(active_values(active_slot), page)
+        header_template.variants[key] = variant
+    return variant.render({
+        "title": title,
+        "description": description,
+        "header": header,
+        "subheader": subheader,
+    }, page)
+
+# 写入结果: status为WRITTEN或UNCHANGED, digest为内容的SHA-256
+WriteResult = namedtuple("WriteResult", ["path", "status", "size", "digest"])
+WRITTEN = "written"
+UNCHANGED = "unchanged"
+
+# 写入文件, 内容与现有文件完全相同时不写入(保留原文件的修改时间, 同步工具不会重新上传)
+def write_file(filepath, data):
+    digest = hashlib.sha256(data).hexdigest()
+    try:
+        if os.path.getsize(filepath) == len(data):
+            with open(filepath, "rb") as f:
+                if f.read() == data:
+                    return WriteResult(filepath, UNCHANGED, len(data), digest)
+    except OSError:
+        pass
+    with open(filepath, "wb") as f:
+        f.write(data)
+    return WriteResult(filepath, WRITTEN, len(data), digest)
+
+# HTML压缩: 一次正则扫描, 不解析DOM
+# 依次匹配连续的注释(连同前后的空白)、IE条件注释、内容需原样保留的元素、标签(属性值中的空白不变)和需要压缩的空白
+# 只压缩HTML定义的空白字符; \s还会匹配不换行空格(U+00A0)、全角空格(U+3000)等, 浏览器显示时不会合并这些字符
+HTML_WHITESPACE = " \t\n\r\f"
+HTML_TOKEN = re.compile(
+    r"[ \t\n\r\f]*<!--(?!\[if).*?-->(?:[ \t\n\r\f]*<!--(?!\[if).*?-->)*[ \t\n\r\f]*"
+    r"|<!--\[if.*?-->"
+    r"|<(pre|textarea|script|style)\b(?:\"[^\"]*\"|'[^']*'|[^'\">])*>.*?</\1\s*>"
+    r"|<[a-zA-Z/!](?:\"[^\"]*\"|'[^']*'|[^'\">])*>"
+    r"|[ \t\n\r\f]{2,}|[\t\n\r\f]",
+    re.S | re.I,
+)
+
+def _minify_token(match):
+    token = match.group(0)
+    if token.lstrip(HTML_WHITESPACE).startswith("<!--") and not token.startswith("<!--[if"):
+        # 删除注释(保留IE条件注释); 注释前后有空白时保留一个空格, 避免相邻的词连在一起
+        return " " if token[0] in HTML_WHITESPACE or token[-1] in HTML_WHITESPACE else ""
+    if token[0] == "<":
+        return token
+    # 连续空白(包括换行和缩进)压缩为一个空格, 不改变页面显示
+    return " "
+
+def minify_html(content):
+    """Drop comments and collapse whitespace runs outside tags and pre/textarea/script/style"""
+    return HTML_TOKEN.sub(_minify_token, content).strip(HTML_WHITESPACE)
+
+# 是否压缩生成的HTML页面(--minify), 工作进程在初始化时设置
+_minify_html = False
+
+def set_minify_html(enabled):
+    global _minify_html
+    _minify_html = enabled
+
+# 页面写入磁盘的最终内容(压缩并转换换行符之后)
+def html_bytes(filepath, content):
+    if _minify_html and filepath.endswith(".html"):
+        content = minify_html(content)
+    # 与文本模式写入保持一致: 换行符转换为系统默认换行符
+    if os.linesep != "\n":
+        content = content.replace("\n", os.linesep)
+    return content.encode("utf-8")
+
 # Write HTML file
-def write_html(filepath, content):
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.write(content)
-    print(f"Generated file: {filepath}")
-
-# 清理文件名(移除非法字符)
-def clean_filename(name):
-    # 使用正则表达式替换非法字符
-    # 这样避免了在f-string中使用反斜杠
-    filename = re.sub(r'[<>:"/\\|?*]', '', name)
-    filename = filename.replace(" ", "_").lower()
-    return filename
-
-# 构建游戏卡片HTML
-def build_game_card(game, with_description=False, is_category_page=False):
-    title = game.get("title", "")
-    slug = clean_filename(title)
-    category = game.get("category", "").lower()
-    description = game.get("description", "")
-    tags = game.get("tags", [])
-    
-    # 准备标签HTML
-    tags_html = " ".join(['<span>{}</span>'.format(tag) for tag in tags])
+def write_html(filepath, content, data=None):
+    """Write content to filepath; data, if given, is the already prepared html_bytes(filepath, content)"""
+    if data is None:
+        data = html_bytes(filepath, content)
+    result = write_file(filepath, data)
+    if result.status == WRITTEN:
+        print(f"Generated file: {filepath}")
+    return result
+
+# 复制文件, 目标文件内容相同时不写入
+def copy_file(src, dst):
+    with open(src, "rb") as f:
+        return write_file(dst, f.read())
+
+# 计算一组构建输入的哈希值
+def hash_inputs(*inputs):
+    digest = hashlib.sha256()
+    for item in inputs:
+        digest.update(json.dumps(item, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+# 增量构建清单
+class BuildManifest:
+    """Record the input hash of every generated file so unchanged pages can be skipped"""
+
+    def __init__(self, site_inputs, path=BUILD_MANIFEST, incremental=False):
+        self.path = path
+        self.incremental = incremental
+        # 所有页面共享的输入: 模板、分类映射和构建器版本
+        self.site_hash = hash_inputs(*site_inputs)
+        self.previous = {}
+        self.current = {}
+        self.skipped = 0
+        # 上次构建的详情页归属 {详情页路径: 游戏ID}, 使同名游戏的页面地址保持不变
+        self.previous_owners = {}
+        self.owners = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.previous = data.get("outputs", {})
+                self.previous_owners = data.get("page_owners", {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable build manifest {path}: {e}")
+
+    def is_fresh(self, filepath, *inputs):
+        """Register filepath as an output and return True if it can be left untouched"""
+        input_hash = hash_inputs(self.site_hash, *inputs)
+        self.current[filepath] = input_hash
+        fresh = (self.incremental
+                 and self.previous.get(filepath) == input_hash
+                 and os.path.exists(filepath))
+        if fresh:
+            self.skipped += 1
+        return fresh
+
+    def add_output(self, filepath, *inputs):
+        """Register a file written outside the page renderers so it is not treated as stale"""
+        self.current[filepath] = hash_inputs(self.site_hash, *inputs)
+
+    def remove_stale(self):
+        """Delete files generated by the previous build that are no longer produced"""
+        removed = []
+        for filepath in self.previous:
+            if filepath not in self.current and os.path.exists(filepath):
+                os.remove(filepath)
+                print(f"Removed file: {filepath}")
+                removed.append(filepath)
+        return removed
+
+    def save(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"builder_version": BUILDER_VERSION, "outputs": self.current, "page_owners": self.owners},
+                      f, indent=2, sort_keys=True, ensure_ascii=False)
+
+# 部署清单
+class DeployManifest:
+    """Size and content hash of every output file, diffed against the previous build for delta uploads"""
+
+    def __init__(self, path=DEPLOY_MANIFEST):
+        self.path = path
+        self.previous = {}
+        self.current = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.previous = json.load(f).get("files", {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable deploy manifest {path}: {e}")
+
+    def record(self, result):
+        """Record a WriteResult returned by write_file/write_html/copy_file"""
+        self.current[result.path] = {"size": result.size, "sha256": result.digest}
+
+    def carry(self, filepath):
+        """Record a file this build left untouched, reusing its previous entry when the size still matches"""
+        if filepath in self.current or not os.path.exists(filepath):
+            return
+        size = os.path.getsize(filepath)
+        entry = self.previous.get(filepath)
+        if entry is None or entry.get("size") != size:
+            entry = {"size": size, "sha256": file_sha256(filepath)}
+        self.current[filepath] = entry
+
+    def diff(self):
+        previous, current = self.previous, self.current
+        return {
+            "added": sorted(path for path in current if path not in previous),
+            "changed": sorted(path for path in current
+                              if path in previous and previous[path].get("sha256") != current[path]["sha256"]),
+            "deleted": sorted(path for path in previous if path not in current),
+        }
+
+    def save(self, diff_path=DEPLOY_DIFF):
+        """Write the manifest and the diff against the previous one; return the diff"""
+        diff = self.diff()
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"builder_version": BUILDER_VERSION, "files": self.current},
+                      f, indent=2, sort_keys=True, ensure_ascii=False)
+        with open(diff_path, "w", encoding="utf-8") as f:
+            json.dump(diff, f, indent=2, ensure_ascii=False)
+        return diff
+
+# 游戏卡片用到的字段(卡片内容只依赖这些字段)
+def card_inputs(game, with_description=False):
+    inputs = {
+        "url": game.detail_path,
+        "title": game.title,
+        "category": game.category,
+        "tags": game.tags,
+        "thumb": game.thumb,
+        "thumb_variants": game.thumb_variants,
+        "thumb_color": game.thumb_color,
+    }
+    if with_description:
+        inputs["description"] = game.card_description
+    return inputs
+
+# <picture>中的现代图片格式, 浏览器使用第一个支持的格式, 否则使用<img>中的JPEG
+THUMB_SOURCE_TYPES = [("avif", "image/avif"), ("webp", "image/webp")]
+
+# 每页前几张卡片(桌面布局的第一行)立即加载, 其余卡片的图片延迟加载
+EAGER_CARDS = 4
+
+# 没有缩略图平均颜色时(未启用--thumbnails), 按分类使用的占位背景色
+CATEGORY_COLORS = {
+    "Action": "#3b2a2c",
+    "Racing": "#3a3224",
+    "Shooting": "#2f3326",
+    "Puzzle": "#2a2d3f",
+    "Sports": "#243629",
+    "Casual": "#36283a",
+    ".io": "#213539",
+    "Clicker": "#3a3022",
+    "Adventure": "#2c3324",
+    "Driving": "#33302a",
+    "Beauty": "#3b2834",
+}
+DEFAULT_THUMB_COLOR = "#2d303a"
+
+# 游戏缩略图HTML: 有本地缩略图时输出<picture>, 否则使用远程缩略图(或占位图)
+# 远程图片服务支持缩放时通过srcset让浏览器按显示宽度选择较小的图片
+def thumb_html(game, page, size, css_class, lazy=False):
+    variants = game.thumb_variants.get(size) if game.thumb_variants else None
+    # 固定宽高避免图片加载后页面跳动: 本地缩略图使用生成的尺寸, 远程缩略图使用图片服务URL中的尺寸
+    if variants:
+        dimensions = THUMBNAIL_SIZES[size]
+    elif game.thumb:
+        dimensions = image_dimensions(game.thumb)
+    else:
+        dimensions = PLACEHOLDER_SIZE
+    attrs = f' width="{dimensions[0]}" height="{dimensions[1]}"' if dimensions else ""
+    if lazy:
+        attrs += ' loading="lazy" decoding="async"'
+    # 平均颜色(或分类颜色)作为加载前的占位背景
+    color = game.thumb_color or CATEGORY_COLORS.get(game.category, DEFAULT_THUMB_COLOR)
+    attrs += f' style="background-color:{color}"'
+    if not variants:
+        if not game.thumb:
+            return f'<img class="{css_class}" src="{relative_url(page, PLACEHOLDER_IMAGE)}"{attrs} alt="{game.title}">'
+        responsive = responsive_image(game.thumb, size)
+        if responsive is None:
+            return f'<img class="{css_class}" src="{game.thumb}"{attrs} alt="{game.title}">'
+        srcset, sizes = responsive
+        return (f'<img class="{css_class}" src="{game.thumb}" srcset="{srcset}" sizes="{sizes}"{attrs} '
+                f'alt="{game.title}">')
+    sources = "".join(
+        f'<source type="{mime}" srcset="{relative_url(page, variants[fmt])}">'
+        for fmt, mime in THUMB_SOURCE_TYPES if fmt in variants
+    )
+    return (f'<picture>{sources}<img class="{css_class}" src="{relative_url(page, variants["jpeg"])}"{attrs} '
+            f'alt="{game.title}"></picture>')
+
+# 构建游戏卡片HTML, page为卡片所在页面相对于网站根目录的路径
+def build_game_card(game, page, with_description=False, lazy=False):
+    title = game.title
     
-    # 准备描述
+    # 准备描述(加载时已截断为大约100个字符)
     desc_html = ""
-    if with_description and description:
-        # 截断描述，保留大约100个字符
-        short_desc = description[:100] + "..." if len(description) > 100 else description
-        desc_html = f'<p class="game-desc">{short_desc}</p>'
+    if with_description and game.card_description:
+        desc_html = f'<p class="game-desc">{game.card_description}</p>'
     
     # 构建游戏卡片HTML
     card_html = """
     <div class="game-card">
         <a href="{url}" class="game-cover-link">
             <div class="game-cover-container">
-                <img class="game-cover" src="{thumb}" alt="{title}">
+                {thumb}
             </div>
         </a>
         <div class="game-info">
@@ -83,208 +461,58 @@ def build_game_card(game, with_description=False, is_category_page=False):
     </div>
     """
     
-    # 修改为相对路径
-    if category.startswith('.'):
-        category_path = category  # 保持.io这样的特殊类别名称
-    else:
-        category_path = category
-        
-    # 根据页面类型选择正确的相对路径
-    if is_category_page:
-        # 在分类页面中，游戏详情页在同一目录下
-        url = "{}.html".format(slug)
-    else:
-        # 在首页使用相对路径
-        url = "games/{}/{}.html".format(category_path, slug)
-    
     return card_html.format(
-        url=url,
-        thumb=game.get("thumb", "/assets/images/placeholder.svg"),
+        url=relative_url(page, game.detail_path),
+        thumb=thumb_html(game, page, "card", "game-cover", lazy),
         title=title,
-        tags=tags_html,
-        category=CATEGORY_MAP.get(game.get("category", ""), game.get("category", "")),
+        tags=game.tags_html,
+        category=game.category_label,
         desc=desc_html
     )
 
+# 分页页面第N页的文件名(首页和分类页相同)
+def page_filename(page_num):
+    return "index.html" if page_num == 1 else f"page{page_num}.html"
+
+# 分类页面第N页的输出路径(相对于网站根目录)
+def category_page_path(category, page_num=1):
+    return "games/{}/{}".format(category.lower(), page_filename(page_num))
+
+# 游戏iframe的默认尺寸(数据中没有宽高时使用)
+DEFAULT_GAME_SIZE = (800, 600)
+
+def game_dimensions(game):
+    if game.width and game.height:
+        return game.width, game.height
+    return DEFAULT_GAME_SIZE
+
+# 点击缩略图或"Play Game"按钮后才创建游戏iframe的脚本, 打开详情页时不加载第三方游戏
+FACADE_SCRIPT = "assets/js/facade.js"
+
 # 构建游戏详情页
-def fix_game_detail_paths(game_detail_html, game_category, game_slug):
-    """Fix paths in game detail pages to use relative paths instead of absolute paths"""
-    # 删除搜索脚本引用
-    if '</head>' in game_detail_html:
-        game_detail_html = game_detail_html.replace('<script src="../../assets/js/search.js"></script>\n</head>', '</head>')
-    
-    # Fix CSS path
-    game_detail_html = game_detail_html.replace('<link rel="stylesheet" href="/assets/css/style.css">', 
-                                              '<link rel="stylesheet" href="../../assets/css/style.css">')
-    game_detail_html = game_detail_html.replace('<link rel="stylesheet" href="assets/css/style.css">', 
-                                              '<link rel="stylesheet" href="../../assets/css/style.css">')
-    
-    # Fix homepage links
-    game_detail_html = game_detail_html.replace('<a href="../../index.html" class="logo">', 
-                                              '<a href="../../index.html" class="logo">')
-    game_detail_html = game_detail_html.replace('<a href="../../index.html" class="category-item', 
-                                              '<a href="../../index.html" class="category-item')
-    game_detail_html = game_detail_html.replace('<a href="../../index.html" class="logo">', 
-                                              '<a href="../../index.html" class="logo">')
-    game_detail_html = game_detail_html.replace('<a href="../../index.html" class="category-item', 
-                                              '<a href="../../index.html" class="category-item')
-    
-    # Fix category page links
-    game_detail_html = game_detail_html.replace('href="games/shooting/index.html"', 'href="../shooting/index.html"')
-    game_detail_html = game_detail_html.replace('href="games/racing/index.html"', 'href="../racing/index.html"')
-    game_detail_html = game_detail_html.replace('href="games/action/index.html"', 'href="../action/index.html"')
-    game_detail_html = game_detail_html.replace('href="games/puzzle/index.html"', 'href="../puzzle/index.html"')
-    game_detail_html = game_detail_html.replace('href="games/sports/index.html"', 'href="../sports/index.html"')
-    game_detail_html = game_detail_html.replace('href="games/casual/index.html"', 'href="../casual/index.html"')
-    game_detail_html = game_detail_html.replace('href="games/.io/index.html"', 'href="../.io/index.html"')
-    game_detail_html = game_detail_html.replace('href="games/clicker/index.html"', 'href="../clicker/index.html"')
-    game_detail_html = game_detail_html.replace('href="games/adventure/index.html"', 'href="../adventure/index.html"')
-    game_detail_html = game_detail_html.replace('href="games/driving/index.html"', 'href="../driving/index.html"')
-    game_detail_html = game_detail_html.replace('href="games/beauty/index.html"', 'href="../beauty/index.html"')
-    game_detail_html = game_detail_html.replace('href="games/other/index.html"', 'href="../other/index.html"')
-    
-    # Fix existing game detail links
-    game_detail_html = game_detail_html.replace('href="../../games/action/"', 'href="../action/index.html"')
-    game_detail_html = game_detail_html.replace('href="../../games/adventure/"', 'href="../adventure/index.html"')
-    game_detail_html = game_detail_html.replace('href="../../games/racing/"', 'href="../racing/index.html"')
-    game_detail_html = game_detail_html.replace('href="../../games/driving/"', 'href="../driving/index.html"')
-    game_detail_html = game_detail_html.replace('href="../../games/shooting/"', 'href="../shooting/index.html"')
-    game_detail_html = game_detail_html.replace('href="../../games/puzzle/"', 'href="../puzzle/index.html"')
-    game_detail_html = game_detail_html.replace('href="../../games/sports/"', 'href="../sports/index.html"')
-    game_detail_html = game_detail_html.replace('href="../../games/casual/"', 'href="../casual/index.html"')
-    game_detail_html = game_detail_html.replace('href="../../games/clicker/"', 'href="../clicker/index.html"')
-    game_detail_html = game_detail_html.replace('href="../../games/.io/"', 'href="../.io/index.html"')
-    game_detail_html = game_detail_html.replace('href="../../games/beauty/"', 'href="../beauty/index.html"')
-    game_detail_html = game_detail_html.replace('href="../../games/other/"', 'href="../other/index.html"')
-    
-    # Fix absolute category page links
-    game_detail_html = game_detail_html.replace('<a href="/games/shooting/" class="category-item', 
-                                              '<a href="../shooting/index.html" class="category-item')
-    game_detail_html = game_detail_html.replace('<a href="/games/racing/" class="category-item', 
-                                              '<a href="../racing/index.html" class="category-item')
-    game_detail_html = game_detail_html.replace('<a href="/games/action/" class="category-item', 
-                                              '<a href="../action/index.html" class="category-item')
-    game_detail_html = game_detail_html.replace('<a href="/games/puzzle/" class="category-item', 
-                                              '<a href="../puzzle/index.html" class="category-item')
-    game_detail_html = game_detail_html.replace('<a href="/games/sports/" class="category-item', 
-                                              '<a href="../sports/index.html" class="category-item')
-    game_detail_html = game_detail_html.replace('<a href="/games/casual/" class="category-item', 
-                                              '<a href="../casual/index.html" class="category-item')
-    game_detail_html = game_detail_html.replace('<a href="/games/.io/" class="category-item', 
-                                              '<a href="../.io/index.html" class="category-item')
-    game_detail_html = game_detail_html.replace('<a href="/games/clicker/" class="category-item', 
-                                              '<a href="../clicker/index.html" class="category-item')
-    game_detail_html = game_detail_html.replace('<a href="/games/adventure/" class="category-item', 
-                                              '<a href="../adventure/index.html" class="category-item')
-    game_detail_html = game_detail_html.replace('<a href="/games/driving/" class="category-item', 
-                                              '<a href="../driving/index.html" class="category-item')
-    game_detail_html = game_detail_html.replace('<a href="/games/beauty/" class="category-item', 
-                                              '<a href="../beauty/index.html" class="category-item')
-    game_detail_html = game_detail_html.replace('<a href="/games/other/" class="category-item', 
-                                              '<a href="../other/index.html" class="category-item')
-    
-    # 修复目录形式的链接
-    game_detail_html = game_detail_html.replace('href="../action/"', 'href="../action/index.html"')
-    game_detail_html = game_detail_html.replace('href="../racing/"', 'href="../racing/index.html"')
-    game_detail_html = game_detail_html.replace('href="../shooting/"', 'href="../shooting/index.html"')
-    game_detail_html = game_detail_html.replace('href="../puzzle/"', 'href="../puzzle/index.html"')
-    game_detail_html = game_detail_html.replace('href="../sports/"', 'href="../sports/index.html"')
-    game_detail_html = game_detail_html.replace('href="../casual/"', 'href="../casual/index.html"')
-    game_detail_html = game_detail_html.replace('href="../.io/"', 'href="../.io/index.html"')
-    game_detail_html = game_detail_html.replace('href="../clicker/"', 'href="../clicker/index.html"')
-    game_detail_html = game_detail_html.replace('href="../adventure/"', 'href="../adventure/index.html"')
-    game_detail_html = game_detail_html.replace('href="../driving/"', 'href="../driving/index.html"')
-    game_detail_html = game_detail_html.replace('href="../beauty/"', 'href="../beauty/index.html"')
-    game_detail_html = game_detail_html.replace('href="../other/"', 'href="../other/index.html"')
-    
-    # 修改游戏详情页链接 
-    game_detail_html = game_detail_html.replace(f'<a href="/games/{game_category}/{game_slug}.html"', 
-                                               f'<a href="{game_slug}.html"')
-    
-    # Update sidebar navigation to match the format used in category pages
-    if '<nav class="category-list">' in game_detail_html and '</nav>' in game_detail_html:
-        nav_start = game_detail_html.find('<nav class="category-list">')
-        nav_end = game_detail_html.find('</nav>', nav_start) + 6
-        
-        # Update navigation with all categories
-        current_category = game_category.lower()
-        
-        new_nav = '''            <nav class="category-list">
-                <a href="../../index.html" class="category-item">Home</a>
-                <a href="../action/index.html" class="category-item{0}">Action</a>
-                <a href="../adventure/index.html" class="category-item{1}">Adventure</a>
-                <a href="../racing/index.html" class="category-item{2}">Racing</a>
-                <a href="../driving/index.html" class="category-item{3}">Driving</a>
-                <a href="../shooting/index.html" class="category-item{4}">Shooting</a>
-                <a href="../puzzle/index.html" class="category-item{5}">Puzzle</a>
-                <a href="../sports/index.html" class="category-item{6}">Sports</a>
-                <a href="../casual/index.html" class="category-item{7}">Casual</a>
-                <a href="../clicker/index.html" class="category-item{8}">Clicker</a>
-                <a href="../.io/index.html" class="category-item{9}">.IO Games</a>
-                <a href="../beauty/index.html" class="category-item{10}">Beauty</a>
-                <a href="../other/index.html" class="category-item{11}">Other</a>
-            </nav>'''.format(
-            ' active' if current_category == 'action' else '',
-            ' active' if current_category == 'adventure' else '',
-            ' active' if current_category == 'racing' else '',
-            ' active' if current_category == 'driving' else '',
-            ' active' if current_category == 'shooting' else '',
-            ' active' if current_category == 'puzzle' else '',
-            ' active' if current_category == 'sports' else '',
-            ' active' if current_category == 'casual' else '',
-            ' active' if current_category == 'clicker' else '',
-            ' active' if current_category == '.io' else '',
-            ' active' if current_category == 'beauty' else '',
-            ' active' if current_category == 'other' else ''
-        )
-        
-        game_detail_html = game_detail_html[:nav_start] + new_nav + game_detail_html[nav_end:]
-    
-    return game_detail_html
 
 def build_game_detail(game, header_template, footer_template):
-    title = game.get("title", "")
-    category = game.get("category", "")
-    description = game.get("description", "")
-    instructions = game.get("instructions", "")
-    tags = game.get("tags", [])
-    
-    # 准备标签HTML
-    tags_html = " ".join(['<span>{}</span>'.format(tag) for tag in tags])
-    
-    # 设置标题和描述
-    header = header_template.replace("{{title}}", title + " - Gun Racing Games")
-    header = header.replace("{{description}}", description)
-    header = header.replace("{{header}}", title)
-    header = header.replace("{{subheader}}", category + " - Play Online For Free")
-    
-    # 设置活动类别
-    active_class = {
-        "Action": "action_active",
-        "Racing": "racing_active", 
-        "Shooting": "shooting_active",
-        "Puzzle": "puzzle_active",
-        "Sports": "sports_active",
-        "Casual": "casual_active",
-        ".io": "io_active",
-        "Clicker": "clicker_active",
-        "Adventure": "adventure_active",
-        "Driving": "driving_active",
-        "Beauty": "beauty_active",
-        "Other": "other_active"
-    }
-    for cat in active_class:
-        if cat == category:
-            header = header.replace("{{" + active_class[cat] + "}}", "active")
-        else:
-            header = header.replace("{{" + active_class[cat] + "}}", "")
-    header = header.replace("{{home_active}}", "")
+    title = game.title
+    category = game.category
+    description = game.description
+    page = game.detail_path
+    
+    # 设置标题、描述和活动类别
+    header = render_header(
+        header_template, page,
+        title + " - Gun Racing Games",
+        description,
+        title,
+        category + " - Play Online For Free",
+        ACTIVE_SLOTS.get(category),
+    )
     
     # 构建游戏详情HTML
+    width, height = game_dimensions(game)
     game_html = """
     <div class="game-detail">
         <div class="game-preview">
-            <img src="{thumb}" alt="{title}" class="game-detail-image">
+            {thumb}
         </div>
         <div class="game-info-detail">
             <h2>{title}</h2>
@@ -309,323 +537,322 @@ def build_game_detail(game, header_template, footer_template):
     
     <div class="game-iframe" id="game-iframe">
         <h3>Play Online</h3>
-        <div class="iframe-container">
-            <iframe src="{iframe_url}" width="800" height="600" scrolling="none" frameborder="0" allowfullscreen></iframe>
+        <div class="iframe-container game-facade" style="aspect-ratio: {width} / {height}; max-width: calc(80vh * {width} / {height});" data-src="{iframe_url}" data-width="{width}" data-height="{height}">
+            {facade_thumb}
+            <button type="button" class="facade-play" aria-label="Play {title}">▶ Play</button>
         </div>
+        <noscript><p><a href="{iframe_url}" class="play-btn">Play {title}</a></p></noscript>
     </div>
+    <script src="{facade_script}" defer></script>
     """.format(
         title=title,
-        thumb=game.get("thumb", "../../assets/images/placeholder.svg"),
-        tags=tags_html,
+        thumb=thumb_html(game, page, "detail", "game-detail-image"),
+        facade_thumb=thumb_html(game, page, "detail", "facade-cover", lazy=True),
+        width=width,
+        height=height,
+        tags=game.tags_html,
         description=description,
-        instructions=instructions,
-        iframe_url=game.get("url", "").replace("https://www.crazygames.com/game/", "https://www.crazygames.com/embed/")
+        instructions=game.instructions,
+        iframe_url=game.url.replace("https://www.crazygames.com/game/", "https://www.crazygames.com/embed/"),
+        facade_script=relative_url(page, FACADE_SCRIPT),
     )
     
     # 拼接完整HTML
-    html_content = header + game_html + footer_template
-    
-    # 修复路径问题
-    html_content = fix_game_detail_paths(html_content, category.lower(), clean_filename(title))
+    html_content = header + game_html + footer_template.render({}, page)
     
     # 保存游戏详情页
-    game_dir = os.path.join("games", category.lower())
-    ensure_directory(game_dir)
-    filepath = os.path.join(game_dir, clean_filename(title) + ".html")
-    write_html(filepath, html_content)
+    ensure_directory(os.path.dirname(page))
+    return write_html(page, html_content)
 
 # 构建分类页面
-def fix_category_page_paths(category_html, category):
-    """Fix paths in category pages to use relative paths instead of absolute paths"""
-    # 删除搜索脚本引用
-    if '</head>' in category_html:
-        category_html = category_html.replace('<script src="../../assets/js/search.js"></script>\n</head>', '</head>')
-    
-    # Fix CSS path
-    category_html = category_html.replace('<link rel="stylesheet" href="/assets/css/style.css">', 
-                                         '<link rel="stylesheet" href="../../assets/css/style.css">')
-    category_html = category_html.replace('<link rel="stylesheet" href="assets/css/style.css">', 
-                                         '<link rel="stylesheet" href="../../assets/css/style.css">')
-    
-    # Fix homepage link
-    category_html = category_html.replace('<a href="../../index.html" class="logo">', 
-                                         '<a href="../../index.html" class="logo">')
-    category_html = category_html.replace('<a href="../../index.html" class="category-item', 
-                                         '<a href="../../index.html" class="category-item')
-    category_html = category_html.replace('<a href="index.html" class="category-item', 
-                                         '<a href="../../index.html" class="category-item')
-    
-    # Fix category page links for all categories
-    category_html = category_html.replace('<a href="/games/shooting/" class="category-item', 
-                                         '<a href="../shooting/index.html" class="category-item')
-    category_html = category_html.replace('<a href="/games/racing/" class="category-item', 
-                                         '<a href="../racing/index.html" class="category-item')
-    category_html = category_html.replace('<a href="/games/action/" class="category-item', 
-                                         '<a href="../action/index.html" class="category-item')
-    category_html = category_html.replace('<a href="/games/puzzle/" class="category-item', 
-                                         '<a href="../puzzle/index.html" class="category-item')
-    category_html = category_html.replace('<a href="/games/sports/" class="category-item', 
-                                         '<a href="../sports/index.html" class="category-item')
-    category_html = category_html.replace('<a href="/games/casual/" class="category-item', 
-                                         '<a href="../casual/index.html" class="category-item')
-    category_html = category_html.replace('<a href="/games/.io/" class="category-item', 
-                                         '<a href="../.io/index.html" class="category-item')
-    category_html = category_html.replace('<a href="/games/clicker/" class="category-item', 
-                                         '<a href="../clicker/index.html" class="category-item')
-    category_html = category_html.replace('<a href="/games/adventure/" class="category-item', 
-                                         '<a href="../adventure/index.html" class="category-item')
-    category_html = category_html.replace('<a href="/games/driving/" class="category-item', 
-                                         '<a href="../driving/index.html" class="category-item')
-    category_html = category_html.replace('<a href="/games/beauty/" class="category-item', 
-                                         '<a href="../beauty/index.html" class="category-item')
-    category_html = category_html.replace('<a href="/games/other/" class="category-item', 
-                                         '<a href="../other/index.html" class="category-item')
-    
-    # 修复从模板生成的导航链接
-    category_html = category_html.replace('<a href="games/action/index.html" class="category-item', 
-                                         '<a href="../action/index.html" class="category-item')
-    category_html = category_html.replace('<a href="games/adventure/index.html" class="category-item', 
-                                         '<a href="../adventure/index.html" class="category-item')
-    category_html = category_html.replace('<a href="games/racing/index.html" class="category-item', 
-                                         '<a href="../racing/index.html" class="category-item')
-    category_html = category_html.replace('<a href="games/driving/index.html" class="category-item', 
-                                         '<a href="../driving/index.html" class="category-item')
-    category_html = category_html.replace('<a href="games/shooting/index.html" class="category-item', 
-                                         '<a href="../shooting/index.html" class="category-item')
-    category_html = category_html.replace('<a href="games/puzzle/index.html" class="category-item', 
-                                         '<a href="../puzzle/index.html" class="category-item')
-    category_html = category_html.replace('<a href="games/sports/index.html" class="category-item', 
-                                         '<a href="../sports/index.html" class="category-item')
-    category_html = category_html.replace('<a href="games/casual/index.html" class="category-item', 
-                                         '<a href="../casual/index.html" class="category-item')
-    category_html = category_html.replace('<a href="games/clicker/index.html" class="category-item', 
-                                         '<a href="../clicker/index.html" class="category-item')
-    category_html = category_html.replace('<a href="games/.io/index.html" class="category-item', 
-                                         '<a href="../.io/index.html" class="category-item')
-    category_html = category_html.replace('<a href="games/beauty/index.html" class="category-item', 
-                                         '<a href="../beauty/index.html" class="category-item')
-    category_html = category_html.replace('<a href="games/other/index.html" class="category-item', 
-                                         '<a href="../other/index.html" class="category-item')
-    
-    # 修改游戏详情页链接
-    category_html = re.sub(r'<a href="/games/' + category + '/(.+?\.html)"', 
-                          r'<a href="\1"', 
-                          category_html)
-    
-    return category_html
-
-def build_category_page(category, games, header_template, footer_template):
+def build_category_page(category, page_num, total_pages, total_games, games, header_template, footer_template):
+    """Build one page of a paginated category listing"""
     category_name = CATEGORY_MAP.get(category, category)
+    page = category_page_path(category, page_num)
+    
+    # 设置标题、描述和活动类别
+    header = render_header(
+        header_template, page,
+        category_name + " Games - Gun Racing Games",
+        "Play the best free online " + category_name + " games at Gun Racing Games! Action-packed " + category_name.lower() + " games with no download required.",
+        category_name + " Games",
+        str(total_games) + " free " + category_name.lower() + " games to play online without download!",
+        ACTIVE_SLOTS.get(category),
+    )
     
-    # Set active category
-    active_class = {
-        "Action": "action_active",
-        "Racing": "racing_active", 
-        "Shooting": "shooting_active",
-        "Puzzle": "puzzle_active",
-        "Sports": "sports_active",
-        "Casual": "casual_active",
-        ".io": "io_active",
-        "Clicker": "clicker_active",
-        "Adventure": "adventure_active",
-        "Driving": "driving_active",
-        "Beauty": "beauty_active",
-        "Other": "other_active"
-    }
-    
-    header = header_template.replace("{{title}}", category_name + " Games - Gun Racing Games")
-    header = header.replace("{{description}}", "Play the best free online " + category_name + " games at Gun Racing Games! Action-packed " + category_name.lower() + " games with no download required.")
-    header = header.replace("{{header}}", category_name + " Games")
-    header = header.replace("{{subheader}}", str(len(games)) + " free " + category_name.lower() + " games to play online without download!")
-    
-    # 设置活动类别
-    for cat in active_class:
-        if cat == category:
-            header = header.replace("{{" + active_class[cat] + "}}", "active")
-        else:
-            header = header.replace("{{" + active_class[cat] + "}}", "")
-    header = header.replace("{{home_active}}", "")
-    
-    # 构建游戏卡片网格，传递is_category_page=True
-    game_cards = "".join([build_game_card(game, is_category_page=True) for game in games])
+    # 构建游戏卡片网格
+    game_cards = "".join([build_game_card(game, page, lazy=i >= EAGER_CARDS) for i, game in enumerate(games)])
     games_grid = '<div class="game-grid">' + game_cards + '</div>'
     
-    # 拼接完整HTML
-    html_content = header + games_grid + footer_template
+    # 多于一页时在网格前后添加分页导航
+    if total_pages > 1:
+        pagination_html = '<div class="pagination">' + create_pagination(page_num, total_pages) + '</div>'
+        games_grid = pagination_html + games_grid + pagination_html
     
-    # 修复路径问题
-    html_content = fix_category_page_paths(html_content, category)
+    # 拼接完整HTML
+    html_content = header + games_grid + footer_template.render({}, page)
     
     # 保存分类页面
-    category_dir = os.path.join("games", category.lower())
-    ensure_directory(category_dir)
-    filepath = os.path.join(category_dir, "index.html")
-    write_html(filepath, html_content)
-
-# 修改fix_homepage_paths函数，删除搜索脚本引用
-def fix_homepage_paths(homepage_html):
-    """Fix paths in the homepage to use relative paths"""
-    # 删除搜索脚本引用
-    if '</head>' in homepage_html:
-        homepage_html = homepage_html.replace('<script src="assets/js/search.js"></script>\n</head>', '</head>')
-    
-    # Fix CSS path
-    homepage_html = homepage_html.replace('<link rel="stylesheet" href="/assets/css/style.css">', 
-                                       '<link rel="stylesheet" href="assets/css/style.css">')
-    
-    # Fix homepage links
-    homepage_html = homepage_html.replace('<a href="/" class="logo">', 
-                                       '<a href="index.html" class="logo">')
-    homepage_html = homepage_html.replace('<a href="/" class="category-item', 
-                                       '<a href="index.html" class="category-item')
-    
-    # Fix category page links
-    homepage_html = homepage_html.replace('href="/games/action/', 
-                                        'href="games/action/')
-    homepage_html = homepage_html.replace('href="/games/racing/', 
-                                        'href="games/racing/')
-    homepage_html = homepage_html.replace('href="/games/shooting/', 
-                                        'href="games/shooting/')
-    homepage_html = homepage_html.replace('href="/games/puzzle/', 
-                                        'href="games/puzzle/')
-    homepage_html = homepage_html.replace('href="/games/sports/', 
-                                        'href="games/sports/')
-    homepage_html = homepage_html.replace('href="/games/casual/', 
-                                        'href="games/casual/')
-    homepage_html = homepage_html.replace('href="/games/.io/', 
-                                        'href="games/.io/')
-    homepage_html = homepage_html.replace('href="/games/clicker/', 
-                                        'href="games/clicker/')
-    homepage_html = homepage_html.replace('href="/games/adventure/', 
-                                        'href="games/adventure/')
-    homepage_html = homepage_html.replace('href="/games/driving/', 
-                                        'href="games/driving/')
-    homepage_html = homepage_html.replace('href="/games/beauty/', 
-                                        'href="games/beauty/')
-    homepage_html = homepage_html.replace('href="/games/other/', 
-                                        'href="games/other/')
-    
-    return homepage_html
+    ensure_directory(os.path.dirname(page))
+    return write_html(page, html_content)
 
-def build_homepage(games, header_template, footer_template):
-    """Build the homepage with pagination"""
-    print("Building homepage...")
-    
-    # 每页显示的游戏数量
-    games_per_page = 28
-    
+# 首页每页显示的游戏数量
+HOME_GAMES_PER_PAGE = 28
+
+# 分类页每页显示的游戏数量(默认值, 可通过--category-page-size修改)
+CATEGORY_GAMES_PER_PAGE = 48
+
+# 将游戏列表切分为分页
+def paginate(games, games_per_page):
+    """Yield (page_num, total_pages, page_games) for every page"""
     # 计算总页数
     total_pages = (len(games) + games_per_page - 1) // games_per_page
-    print(f"总共 {len(games)} 个游戏，每页 {games_per_page} 个，共 {total_pages} 页")
     
-    # 为每一页创建HTML
     for page_num in range(1, total_pages + 1):
         # 计算当前页的游戏范围
         start_idx = (page_num - 1) * games_per_page
         end_idx = min(start_idx + games_per_page, len(games))
-        current_page_games = games[start_idx:end_idx]
-        
-        # 创建分页导航
-        pagination_html = create_pagination(page_num, total_pages)
-        
-        # 创建游戏卡片HTML
-        game_cards_html = ""
-        for game in current_page_games:
-            game_cards_html += build_game_card(game, with_description=True)
-        
-        # 组合页面内容
-        content = f"""
+        yield page_num, total_pages, games[start_idx:end_idx]
+
+# 将游戏列表切分为首页的各个分页
+def paginate_homepage(games, games_per_page=HOME_GAMES_PER_PAGE):
+    total_pages = (len(games) + games_per_page - 1) // games_per_page
+    print(f"总共 {len(games)} 个游戏，每页 {games_per_page} 个，共 {total_pages} 页")
+    return paginate(games, games_per_page)
+
+# 无限滚动: 首页第2页及之后的卡片HTML片段(文件名带内容哈希)
+HOME_FRAGMENT_DIR = "assets/fragments/home"
+INFINITE_SCROLL_SCRIPT = "assets/js/infinite-scroll.js"
+
+def write_home_fragments(pages):
+    """Write the cards of each homepage page as an HTML fragment linked relative to index.html"""
+    ensure_directory(HOME_FRAGMENT_DIR)
+    results = []
+    for page_num, _, page_games in pages:
+        content = "".join(build_game_card(game, page_filename(1), with_description=True, lazy=True)
+                          for game in page_games)
+        # 文件名使用实际写入内容(--minify压缩后)的哈希, 同一文件名永远对应相同的内容
+        path = f"{HOME_FRAGMENT_DIR}/page-{page_num}.html"
+        data = html_bytes(path, content)
+        digest = hashlib.sha256(data).hexdigest()
+        results.append(write_html(fingerprinted_path(path, digest), content, data))
+    return results
+
+def build_homepage_page(page_num, total_pages, current_page_games, fragments, header_template, footer_template):
+    """Build one page of the paginated homepage; fragments lists the card fragments loaded by infinite scroll"""
+    page = page_filename(page_num)
+    
+    # 创建分页导航
+    pagination_html = create_pagination(page_num, total_pages)
+    
+    # 创建游戏卡片HTML
+    game_cards_html = ""
+    for i, game in enumerate(current_page_games):
+        game_cards_html += build_game_card(game, page, with_description=True, lazy=i >= EAGER_CARDS)
+    
+    # 无限滚动时网格中记录后续各页的片段地址, 分页导航保留给搜索引擎和不支持脚本的浏览器
+    grid_attrs = ""
+    script_html = ""
+    if fragments:
+        grid_attrs = ' data-fragments="{}"'.format(" ".join(relative_url(page, fragment) for fragment in fragments))
+        script_html = f'<script src="{relative_url(page, INFINITE_SCROLL_SCRIPT)}" defer></script>'
+    
+    # 组合页面内容
+    content = f"""
         <div class="pagination">{pagination_html}</div>
-        <div class="game-grid featured-grid">
+        <div class="game-grid featured-grid"{grid_attrs}>
             {game_cards_html}
         </div>
         <div class="pagination">{pagination_html}</div>
+        {script_html}
         """
-        
-        # 使用模板创建完整页面
-        page_title = "Free Online Games - Gun Racing Games"
-        page_description = "Play the best free online games at Gun Racing Games! Over 1000 free games including action, shooting, racing, puzzle and more. No download required, play instantly!"
-        
-        # 替换模板变量
-        page_html = header_template.replace("{{title}}", page_title)
-        page_html = page_html.replace("{{description}}", page_description)
-        page_html = page_html.replace("{{header}}", "All Games")
-        page_html = page_html.replace("{{subheader}}", "Play the best free online games instantly with no download required!")
-        page_html = page_html.replace("{{home_active}}", "active")
-        
-        # 清除其他活动状态标记
-        for category in CATEGORY_MAP.keys():
-            cat_lower = category.lower()
-            page_html = page_html.replace(f"{{{{{cat_lower}_active}}}}", "")
-        
-        # 添加内容和页脚
-        page_html += content + footer_template
-        
-        # 保存页面
-        if page_num == 1:
-            filename = "index.html"
+    
+    # 使用模板创建完整页面
+    page_title = "Free Online Games - Gun Racing Games"
+    page_description = "Play the best free online games at Gun Racing Games! Over 1000 free games including action, shooting, racing, puzzle and more. No download required, play instantly!"
+    
+    # 填充模板变量
+    page_html = render_header(
+        header_template, page,
+        page_title,
+        page_description,
+        "All Games",
+        "Play the best free online games instantly with no download required!",
+        HOME_ACTIVE_SLOT,
+    )
+    
+    # 添加内容和页脚
+    page_html += content + footer_template.render({}, page)
+    
+    # 保存页面
+    return write_html(page, page_html)
+
+# 页面渲染任务: (类型, 参数), 参数之后再追加header和footer模板
+RENDERERS = {
+    "category": build_category_page,
+    "detail": build_game_detail,
+    "homepage": build_homepage_page,
+}
+
+def run_render_task(task, header_template, footer_template):
+    kind, args = task
+    return RENDERERS[kind](*args, header_template, footer_template)
+
+# 工作进程中的模板(每个进程只读取一次)
+_worker_templates = None
+
+def _init_render_worker(minify_html, asset_map):
+    global _worker_templates
+    set_minify_html(minify_html)
+    set_asset_map(asset_map)
+    _worker_templates = (load_template("header"), load_template("footer"))
+
+def _run_render_task_in_worker(task):
+    return run_render_task(task, *_worker_templates)
+
+# 每批渲染的页面数, 限制同时保存在内存中的游戏记录
+RENDER_BATCH_SIZE = 1000
+
+# 分批执行渲染任务, jobs > 1 时使用进程池并行渲染
+class PageRenderer:
+    """Collect render tasks and run them in batches, serially or on a process pool"""
+
+    def __init__(self, header_template, footer_template, jobs=1, batch_size=RENDER_BATCH_SIZE, on_write=None):
+        self.header_template = header_template
+        self.footer_template = footer_template
+        self.jobs = jobs
+        self.batch_size = batch_size
+        # 每个页面写入后调用, 参数为WriteResult
+        self.on_write = on_write
+        self.pending = []
+        self.rendered = 0
+        # 写入结果统计(written/unchanged)
+        self.write_stats = Counter()
+        self.pool = None
+        if jobs > 1:
+            print(f"Rendering pages with {jobs} worker processes")
+            self.pool = multiprocessing.Pool(jobs, initializer=_init_render_worker, initargs=(_minify_html, _asset_map))
+
+    def submit(self, task):
+        self.pending.append(task)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        tasks, self.pending = self.pending, []
+        if self.pool is None or len(tasks) <= 1:
+            results = (run_render_task(task, self.header_template, self.footer_template) for task in tasks)
         else:
-            filename = f"page{page_num}.html"
-        
-        write_html(filename, page_html)
-        
-        # 如果是分页页面（非首页），修正导航链接路径
-        if page_num > 1:
-            # 读取刚刚写入的文件
-            with open(filename, 'r', encoding='utf-8') as f:
-                page_content = f.read()
-            
-            # 修正导航链接路径，确保它们指向正确的路径
-            # 这里我们需要确保分页页面上的导航链接是正确的
-            # 例如，从page2.html点击"Action"应该正确导航到games/action/index.html
-            
-            # 写回文件
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(page_content)
+            # 按块分配任务, 减少进程间通信次数
+            chunksize = max(1, len(tasks) // (self.jobs * 4))
+            results = self.pool.imap_unordered(_run_render_task_in_worker, tasks, chunksize)
+        for result in results:
+            self.write_stats[result.status] += 1
+            if self.on_write is not None:
+                self.on_write(result)
+        self.rendered += len(tasks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.pool is not None:
+            if exc_type is None:
+                self.pool.close()
+            else:
+                self.pool.terminate()
+            self.pool.join()
+
+# 分页导航中当前页前后显示的页码数
+PAGINATION_WINDOW = 2
+
+# 分页导航的固定片段
+PAGINATION_PREV_DISABLED = '<span class="page-nav prev disabled" aria-label="Previous page"><i class="page-icon">←</i></span>'
+PAGINATION_NEXT_DISABLED = '<span class="page-nav next disabled" aria-label="Next page"><i class="page-icon">→</i></span>'
+PAGINATION_ELLIPSIS = '<span class="page-ellipsis">…</span>'
+
+class Pagination:
+    """Windowed pagination: first and last page, the pages around the current one and ellipses.
+
+    The link, previous and next markup of every page is built once and shared by all pages.
+    """
+
+    def __init__(self, total_pages, window=PAGINATION_WINDOW, page_url=page_filename):
+        self.total_pages = total_pages
+        self.window = window
+        # 下标即页码, 下标0不使用
+        urls = [None] + [page_url(i) for i in range(1, total_pages + 1)]
+        self.links = [None] + [f'<a href="{urls[i]}" class="page-number">{i}</a>' for i in range(1, total_pages + 1)]
+        self.prev = [None] + [f'<a href="{urls[i]}" class="page-nav prev" aria-label="Previous page"><i class="page-icon">←</i></a>'
+                              for i in range(1, total_pages + 1)]
+        self.next = [None] + [f'<a href="{urls[i]}" class="page-nav next" aria-label="Next page"><i class="page-icon">→</i></a>'
+                              for i in range(1, total_pages + 1)]
+
+    def page_numbers(self, current_page):
+        """Page numbers to show, with None where an ellipsis goes"""
+        total = self.total_pages
+        start = max(2, current_page - self.window)
+        end = min(total - 1, current_page + self.window)
+        # 只省略一页时直接显示该页
+        if start == 3:
+            start = 2
+        if end == total - 2:
+            end = total - 1
+        numbers = [1]
+        if start > 2:
+            numbers.append(None)
+        numbers.extend(range(start, end + 1))
+        if end < total - 1:
+            numbers.append(None)
+        if total > 1:
+            numbers.append(total)
+        return numbers
+
+    def render(self, current_page):
+        # 上一页按钮
+        parts = [self.prev[current_page - 1] if current_page > 1 else PAGINATION_PREV_DISABLED]
+        # 页码
+        for i in self.page_numbers(current_page):
+            if i is None:
+                parts.append(PAGINATION_ELLIPSIS)
+            elif i == current_page:
+                parts.append(f'<span class="page-number current">{i}</span>')
+            else:
+                parts.append(self.links[i])
+        # 下一页按钮
+        parts.append(self.next[current_page + 1] if current_page < self.total_pages else PAGINATION_NEXT_DISABLED)
+        return "".join(parts)
+
+# 同一总页数的分页导航只构建一次
+@lru_cache(maxsize=None)
+def get_pagination(total_pages):
+    return Pagination(total_pages)
 
 # 构建分页导航HTML
 def create_pagination(current_page, total_pages):
-    pagination_html = ''
-    
-    # 上一页按钮
-    if current_page > 1:
-        prev_page = "index.html" if current_page == 2 else f"page{current_page - 1}.html"
-        pagination_html += f'<a href="{prev_page}" class="page-nav prev" aria-label="Previous page"><i class="page-icon">←</i></a>'
-    else:
-        pagination_html += '<span class="page-nav prev disabled" aria-label="Previous page"><i class="page-icon">←</i></span>'
-    
-    # 页码
-    for i in range(1, total_pages + 1):
-        if i == current_page:
-            pagination_html += f'<span class="page-number current">{i}</span>'
-        else:
-            page_link = "index.html" if i == 1 else f"page{i}.html"
-            pagination_html += f'<a href="{page_link}" class="page-number">{i}</a>'
-    
-    # 下一页按钮
-    if current_page < total_pages:
-        next_page = f"page{current_page + 1}.html"
-        pagination_html += f'<a href="{next_page}" class="page-nav next" aria-label="Next page"><i class="page-icon">→</i></a>'
-    else:
-        pagination_html += '<span class="page-nav next disabled" aria-label="Next page"><i class="page-icon">→</i></span>'
-    
-    return pagination_html
+    return get_pagination(total_pages).render(current_page)
 
 # 复制静态资源文件
 def copy_static_assets():
+    results = []
+    
     # 复制CSS文件
     ensure_directory("assets/css")
     
     # 从旧站点复制样式表(如果存在)
     if os.path.exists("style.css"):
-        shutil.copy("style.css", "assets/css/style.css")
-        print("复制样式表: style.css -> assets/css/style.css")
+        results.append(copy_file("style.css", "assets/css/style.css"))
+        if results[-1].status == WRITTEN:
+            print("复制样式表: style.css -> assets/css/style.css")
     
     # 复制图片占位符
     ensure_directory("assets/images")
     if os.path.exists("images/local_placeholder.svg"):
-        shutil.copy("images/local_placeholder.svg", "assets/images/placeholder.svg")
-        print("复制占位图: images/local_placeholder.svg -> assets/images/placeholder.svg")
+        results.append(copy_file("images/local_placeholder.svg", "assets/images/placeholder.svg"))
+        if results[-1].status == WRITTEN:
+            print("复制占位图: images/local_placeholder.svg -> assets/images/placeholder.svg")
+    
+    return results
 
 # 创建默认CSS样式
 def create_default_css():
@@ -1046,7 +1273,48 @@ a {
     }
 }
 """
-        write_html(css_path, default_css)
+        return write_html(css_path, default_css)
+
+# 带内容哈希的文件名: assets/css/style.css -> assets/css/style.<哈希>.css
+def fingerprinted_path(path, digest):
+    root, ext = posixpath.splitext(path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+# 为静态资源生成带内容哈希的副本
+def fingerprint_assets(paths=FINGERPRINT_ASSETS):
+    """Copy each asset to a content-hashed name; return ({path: hashed path}, [WriteResult])"""
+    asset_map = {}
+    results = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+        hashed = fingerprinted_path(path, hashlib.sha256(data).hexdigest())
+        result = write_file(hashed, data)
+        if result.status == WRITTEN:
+            print(f"Fingerprinted asset: {path} -> {hashed}")
+        asset_map[path] = hashed
+        results.append(result)
+    return asset_map, results
+
+# 生成缓存响应头配置: 带哈希的资源永久缓存, 其他文件使用服务器默认设置
+def write_cache_headers(hashed_paths):
+    lines = ["# Generated by build_site_new.py: fingerprinted assets never change"]
+    for hashed in sorted(hashed_paths):
+        lines.append(f"/{hashed}")
+        lines.append(f"  Cache-Control: {IMMUTABLE_CACHE_CONTROL}")
+    results = [write_html(HEADERS_FILE, "\n".join(lines) + "\n")]
+    
+    extensions = "|".join(sorted({posixpath.splitext(path)[1].lstrip(".") for path in hashed_paths}))
+    nginx_snippet = f"""# Generated by build_site_new.py; include inside the server block.
+# Fingerprinted assets (name.<hash>.ext) never change, so browsers may cache them forever.
+location ~ "^/assets/.+\\.[0-9a-f]{{{FINGERPRINT_LENGTH}}}\\.({extensions})$" {{
+    add_header Cache-Control "{IMMUTABLE_CACHE_CONTROL}";
+}}
+"""
+    results.append(write_html(NGINX_SNIPPET, nginx_snippet))
+    return results
 
 # 创建模板文件
 def create_templates():
@@ -1059,33 +1327,38 @@ def create_templates():
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{{title}} - Gun Racing Games</title>
-    <link rel="stylesheet" href="assets/css/style.css">
+    <link rel="stylesheet" href="{{url:assets/css/style.css}}">
     <meta name="description" content="{{description}}">
+    <script src="{{url:assets/js/search.js}}" defer></script>
 </head>
 <body>
     <div class="layout">
         <!-- Sidebar Navigation -->
         <aside class="sidebar">
             <div class="sidebar-header">
-                <a href="index.html" class="logo"> 
+                <a href="{{url:index.html}}" class="logo"> 
                     <span class="logo-icon">🔫</span> 
                     <span class="logo-text">Gun Racing Games</span> 
                 </a>
             </div>
+            <div class="sidebar-search">
+                <input type="search" id="site-search" placeholder="Search games..." autocomplete="off" aria-label="Search games">
+                <div id="search-results" class="search-results"></div>
+            </div>
             <nav class="category-list">
-                <a href="index.html" class="category-item {{home_active}}">Home</a>
-                <a href="games/action/index.html" class="category-item {{action_active}}">Action</a>
-                <a href="games/adventure/index.html" class="category-item {{adventure_active}}">Adventure</a>
-                <a href="games/racing/index.html" class="category-item {{racing_active}}">Racing</a>
-                <a href="games/driving/index.html" class="category-item {{driving_active}}">Driving</a>
-                <a href="games/shooting/index.html" class="category-item {{shooting_active}}">Shooting</a>
-                <a href="games/puzzle/index.html" class="category-item {{puzzle_active}}">Puzzle</a>
-                <a href="games/sports/index.html" class="category-item {{sports_active}}">Sports</a>
-                <a href="games/casual/index.html" class="category-item {{casual_active}}">Casual</a>
-                <a href="games/clicker/index.html" class="category-item {{clicker_active}}">Clicker</a>
-                <a href="games/.io/index.html" class="category-item {{io_active}}">.IO Games</a>
-                <a href="games/beauty/index.html" class="category-item {{beauty_active}}">Beauty</a>
-                <a href="games/other/index.html" class="category-item {{other_active}}">Other</a>
+                <a href="{{url:index.html}}" class="category-item {{home_active}}">Home</a>
+                <a href="{{url:games/action/index.html}}" class="category-item {{action_active}}">Action</a>
+                <a href="{{url:games/adventure/index.html}}" class="category-item {{adventure_active}}">Adventure</a>
+                <a href="{{url:games/racing/index.html}}" class="category-item {{racing_active}}">Racing</a>
+                <a href="{{url:games/driving/index.html}}" class="category-item {{driving_active}}">Driving</a>
+                <a href="{{url:games/shooting/index.html}}" class="category-item {{shooting_active}}">Shooting</a>
+                <a href="{{url:games/puzzle/index.html}}" class="category-item {{puzzle_active}}">Puzzle</a>
+                <a href="{{url:games/sports/index.html}}" class="category-item {{sports_active}}">Sports</a>
+                <a href="{{url:games/casual/index.html}}" class="category-item {{casual_active}}">Casual</a>
+                <a href="{{url:games/clicker/index.html}}" class="category-item {{clicker_active}}">Clicker</a>
+                <a href="{{url:games/.io/index.html}}" class="category-item {{io_active}}">.IO Games</a>
+                <a href="{{url:games/beauty/index.html}}" class="category-item {{beauty_active}}">Beauty</a>
+                <a href="{{url:games/other/index.html}}" class="category-item {{other_active}}">Other</a>
             </nav>
             <div class="sidebar-footer">
                 <p>© 2024 <a href="https://gunracing.online/" target="_blank">gunracing games</a></p>
@@ -1117,88 +1390,314 @@ def create_templates():
 """
         write_html(footer_template_path, footer_template)
 
-# 为子目录游戏详情页添加CSS和JS路径修正
-def adjust_paths_for_detail(html_content):
-    # 修正CSS路径
-    adjusted = html_content.replace('href="assets/css/style.css"', 'href="../../assets/css/style.css"')
-    # 删除搜索JS脚本引用
-    adjusted = adjusted.replace('<script src="../../assets/js/search.js"></script>\n</head>', '</head>')
-    return adjusted
-
-# 为子目录分类页面添加CSS和JS路径修正
-def adjust_paths_for_category(html_content):
-    # 修正CSS路径
-    adjusted = html_content.replace('href="assets/css/style.css"', 'href="../../assets/css/style.css"')
-    # 删除搜索JS脚本引用
-    adjusted = adjusted.replace('<script src="../../assets/js/search.js"></script>\n</head>', '</head>')
-    return adjusted
-
-# 为主页添加CSS和JS路径修正
-def adjust_paths_for_home(html_content):
-    # 删除搜索JS脚本引用
-    adjusted = html_content.replace('<script src="assets/js/search.js"></script>\n</head>', '</head>')
-    return adjusted
+# 卡片数据只包含渲染游戏卡片需要的字段
+def card_data(game):
+    return {
+        "slug": game.slug,
+        "title": game.title,
+        "thumb": game.thumb,
+        "category": game.category,
+        "tags": list(game.tags),
+    }
+
+# 按页写入卡片数据, 返回 (清单中的页面文件列表, 写入结果)
+def write_card_data_pages(name, pages):
+    ensure_directory(f"{DATA_DIR}/{name}")
+    files = []
+    results = []
+    for page_num, _, page_games in pages:
+        content = json.dumps([card_data(game) for game in page_games], separators=(",", ":"), ensure_ascii=False)
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        result = write_html(fingerprinted_path(f"{DATA_DIR}/{name}/page-{page_num}.json", digest), content)
+        files.append(posixpath.relpath(result.path, DATA_DIR))
+        results.append(result)
+    return files, results
+
+# 写入卡片数据分片和清单, 分页与首页、分类页的HTML分页一致
+def write_card_data(summaries, categories, category_page_size):
+    """Write paged card JSON for all games and every category plus a manifest; return WriteResults"""
+    files, results = write_card_data_pages("all", paginate(summaries, HOME_GAMES_PER_PAGE))
+    data_manifest = {
+        "fields": CARD_DATA_FIELDS,
+        "all": {"games": len(summaries), "page_size": HOME_GAMES_PER_PAGE, "pages": files},
+        "categories": {},
+    }
+    for category in CATEGORY_MAP:
+        cat_games = categories.get(category)
+        if not cat_games:
+            continue
+        files, category_results = write_card_data_pages(category.lower(), paginate(cat_games, category_page_size))
+        data_manifest["categories"][category] = {
+            "label": CATEGORY_MAP[category],
+            "games": len(cat_games),
+            "page_size": category_page_size,
+            "pages": files,
+        }
+        results += category_results
+    manifest_content = json.dumps(data_manifest, separators=(",", ":"), ensure_ascii=False)
+    return results, write_html(DATA_MANIFEST, manifest_content)
+
+# 写入搜索索引分片(压缩的JSON)
+def write_search_index(search_index):
+    # 搜索脚本必须忽略与建索引时相同的词, 否则包含这些词的搜索找不到结果
+    if os.path.exists(SEARCH_SCRIPT):
+        with open(SEARCH_SCRIPT, "r", encoding="utf-8") as f:
+            if script_stopwords(f.read()) != STOPWORDS:
+                print(f"Warning: STOPWORDS in {SEARCH_SCRIPT} differ from search_index.STOPWORDS")
+    ensure_directory(SEARCH_DIR)
+    results = []
+    for prefix, shard in search_index.shards():
+        content = json.dumps(shard, separators=(",", ":"), ensure_ascii=False)
+        results.append(write_html(shard_path(prefix), content))
+    return results
+
+# 下载并处理所有游戏的缩略图, 返回 {远程地址: Thumbnail}
+def build_thumbnails(catalog_path, source_dir=None, use_cache=True):
+    if not thumbnails_available():
+        print("Pillow is not installed; skipping thumbnails (pip install Pillow)")
+        return {}
+    try:
+        fetcher = DirectoryFetcher(source_dir) if source_dir else HttpFetcher()
+    except FetchError as e:
+        print(f"Skipping thumbnails: {e}")
+        return {}
+    print("Processing thumbnails...")
+    urls = [game.thumb for game in iter_games(catalog_path, use_cache=use_cache) if game.thumb]
+    thumbs, stats = ThumbnailPipeline(fetcher).run(urls)
+    print(f"Thumbnails: {stats[PROCESSED]} processed, {stats[REUSED]} unchanged, {stats[FAILED]} failed")
+    return thumbs
+
+# 解析命令行参数
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static game website")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only re-render pages whose inputs changed since the last build")
+    parser.add_argument("--catalog",
+                        help="game data file, a JSON array or NDJSON (default: " + " or ".join(CATALOG_FILES) + ")")
+    parser.add_argument("--no-catalog-cache", action="store_true",
+                        help="always parse the game data file instead of reading its binary snapshot")
+    parser.add_argument("--category-page-size", type=int, default=CATEGORY_GAMES_PER_PAGE,
+                        help=f"games per category page (default: {CATEGORY_GAMES_PER_PAGE})")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="number of worker processes used to render pages (0 = all cores)")
+    parser.add_argument("--infinite-scroll", action="store_true",
+                        help="load the following homepage pages as card fragments while scrolling index.html")
+    parser.add_argument("--thumbnails", action="store_true",
+                        help="download thumbnails and serve resized WebP/AVIF/JPEG copies from assets/thumbs")
+    parser.add_argument("--thumbnail-source", metavar="DIR",
+                        help="read thumbnails from DIR/<host>/<path> instead of downloading them (implies --thumbnails)")
+    parser.add_argument("--minify", action="store_true",
+                        help="strip comments and collapse whitespace in the generated HTML")
+    parser.add_argument("--precompress", action="store_true",
+                        help="write .gz and .br siblings of changed HTML, CSS and JSON files")
+    args = parser.parse_args(argv)
+    if args.category_page_size <= 0:
+        parser.error("--category-page-size must be positive")
+    if args.jobs <= 0:
+        args.jobs = os.cpu_count() or 1
+    return args
 
 # 主函数
-def main():
+def main(argv=None):
+    args = parse_args(argv)
     print("Building static game website...")
     start_time = datetime.now()
     
-        # 检查是否存在游戏数据文件
-    try:
-        if os.path.exists("games.json"):
-            with open("games.json", "r", encoding="utf-8") as f:
-                games = json.load(f)
-            print(f"Loaded {len(games)} games from games.json")
-        elif os.path.exists("crazy_games.json"):
-            with open("crazy_games.json", "r", encoding="utf-8") as f:
-                games = json.load(f)
-                print(f"Loaded {len(games)} games from crazy_games.json")
-        else:
-            print("Error: No games data file found (tried games.json and crazy_games.json)")
-            return
-    except Exception as e:
-        print(f"Failed to load game data: {e}")
+    # 检查是否存在游戏数据文件
+    catalog_path = args.catalog or find_catalog()
+    if not catalog_path or not os.path.exists(catalog_path):
+        print(f"Error: No games data file found (tried {args.catalog or ', '.join(CATALOG_FILES)})")
         return
     
     # 确保必要的目录存在
     ensure_directory("games")
     for category in CATEGORY_MAP.keys():
-        ensure_directory(f"games/{category}")
+        ensure_directory(posixpath.dirname(category_page_path(category)))
+    
+    # 写入结果统计和部署清单
+    write_stats = Counter()
+    deploy = DeployManifest()
     
     # 复制静态资源
-    copy_static_assets()
+    for result in copy_static_assets():
+        write_stats[result.status] += 1
+        deploy.record(result)
     
     # 创建默认CSS
-    create_default_css()
+    result = create_default_css()
+    if result is not None:
+        write_stats[result.status] += 1
+        deploy.record(result)
+    
+    # 静态资源加内容指纹, 页面中的链接指向带哈希的文件
+    asset_map, results = fingerprint_assets()
+    set_asset_map(asset_map)
+    for result in results:
+        write_stats[result.status] += 1
+        deploy.record(result)
 
     # 读取模板
-    header_template = read_template("header")
-    footer_template = read_template("footer")
-    
-    # 按分类分组游戏
+    header_template = load_template("header")
+    footer_template = load_template("footer")
+    
+    # 增量构建清单
+    # 压缩HTML的开关也是所有页面的输入
+    set_minify_html(args.minify)
+    manifest = BuildManifest([BUILDER_VERSION, header_template.source, footer_template.source, CATEGORY_MAP,
+                              args.minify, asset_map],
+                             incremental=args.incremental)
+    # 旧版本的带哈希资源在下次构建时作为过期文件删除
+    for hashed in asset_map.values():
+        manifest.add_output(hashed)
+    
+    # 本地缩略图(可选)
+    thumbs = {}
+    if args.thumbnails or args.thumbnail_source:
+        try:
+            thumbs = build_thumbnails(catalog_path, args.thumbnail_source, use_cache=not args.no_catalog_cache)
+        except (OSError, ValueError) as e:
+            print(f"Failed to load game data: {e}")
+            return
+        for thumb in thumbs.values():
+            for paths in thumb.variants.values():
+                for path in paths.values():
+                    # 不再使用的缩略图在下次构建时作为过期文件删除
+                    manifest.add_output(path)
+                    deploy.carry(path)
+    
+    # 分类页和首页使用的游戏卡片摘要(按加载顺序), 以及按分类分组的摘要
+    summaries = []
     categories = {}
-    for game in games: # 使用加载的游戏数据
-        cat = game.get("category", "Other")
-        if cat not in categories:
-            categories[cat] = []
-        categories[cat].append(game)
-    
-    # 构建分类页面
-    for category, cat_games in categories.items():
-        if category in CATEGORY_MAP:
-            print(f"Building category page: {category} ({len(cat_games)} games)")
-            build_category_page(category, cat_games, header_template, footer_template)
-    
-    # Build game detail pages
-    print("Building game detail pages...")
-    for game in games: # 使用加载的游戏数据
-        if "title" in game and "category" in game:
-            build_game_detail(game, header_template, footer_template)
-    
-    # Build homepage
-    print("Building homepage...")
-    build_homepage(games, header_template, footer_template) # 使用加载的游戏数据
+    detail_count = 0
+    # 详情页文件名索引, 检测标题不同但文件名相同的游戏
+    slug_index = SlugIndex(manifest.previous_owners)
+    # 站内搜索索引(包含所有有详情页的游戏)
+    search_index = SearchIndex()
+    search_time = 0.0
+    
+    with PageRenderer(header_template, footer_template, jobs=args.jobs, on_write=deploy.record) as renderer:
+        # Build game detail pages: 边读取游戏数据边渲染, 内存中只保留一批游戏记录
+        print("Building game detail pages...")
+        try:
+            for game in iter_games(catalog_path, use_cache=not args.no_catalog_cache, slug_index=slug_index):
+                thumb = thumbs.get(game.thumb)
+                if thumb is not None:
+                    game.thumb_variants, game.thumb_color = thumb
+                summary = game.summary()
+                summaries.append(summary)
+                categories.setdefault(game.category or "Other", []).append(summary)
+                
+                if game.has_detail_page():
+                    detail_count += 1
+                    search_start = time.perf_counter()
+                    search_index.add(game)
+                    search_time += time.perf_counter() - search_start
+                    filepath = game.detail_path
+                    if manifest.is_fresh(filepath, "detail", game.to_dict(), game.thumb_variants, game.thumb_color):
+                        continue
+                    # 提前创建目录, 避免并行渲染时多个进程同时创建
+                    ensure_directory(os.path.dirname(filepath))
+                    renderer.submit(("detail", (game,)))
+        except (OSError, ValueError) as e:
+            print(f"Failed to load game data: {e}")
+            return
+        print(f"Loaded {len(summaries)} games from {catalog_path}")
+        slug_index.report_collisions()
+        manifest.owners = slug_index.owners()
+        
+        # 构建分类页面
+        for category, cat_games in categories.items():
+            if category in CATEGORY_MAP:
+                print(f"Building category page: {category} ({len(cat_games)} games)")
+                for page_num, total_pages, page_games in paginate(cat_games, args.category_page_size):
+                    if manifest.is_fresh(category_page_path(category, page_num), "category", category,
+                                         page_num, total_pages, len(cat_games),
+                                         [card_inputs(game) for game in page_games]):
+                        continue
+                    renderer.submit(("category", (category, page_num, total_pages, len(cat_games), page_games)))
+        
+        # Build homepage
+        print("Building homepage...")
+        home_pages = list(paginate_homepage(summaries))
+        fragments = None
+        if args.infinite_scroll:
+            results = write_home_fragments(home_pages[1:])
+            for result in results:
+                write_stats[result.status] += 1
+                deploy.record(result)
+                manifest.add_output(result.path, "fragment", args.minify)
+            fragments = [result.path for result in results]
+        for page_num, total_pages, page_games in home_pages:
+            page_fragments = fragments if page_num == 1 else None
+            if manifest.is_fresh(page_filename(page_num), "homepage", page_num, total_pages,
+                                 [card_inputs(game, with_description=True) for game in page_games], page_fragments):
+                continue
+            renderer.submit(("homepage", (page_num, total_pages, page_games, page_fragments)))
+        
+        renderer.flush()
+    write_stats.update(renderer.write_stats)
+    
+    # 搜索索引分片
+    search_start = time.perf_counter()
+    results = write_search_index(search_index)
+    search_time += time.perf_counter() - search_start
+    for result in results:
+        write_stats[result.status] += 1
+        deploy.record(result)
+        manifest.add_output(result.path)
+    print(f"Search index: {len(search_index.postings)} terms in {len(results)} shards, "
+          f"{sum(result.size for result in results):,} bytes, built in {search_time:.2f} seconds")
+    
+    # 游戏卡片数据分片(替代完整的games.json)
+    data_results, data_manifest_result = write_card_data(summaries, categories, args.category_page_size)
+    for result in data_results + [data_manifest_result]:
+        write_stats[result.status] += 1
+        deploy.record(result)
+        manifest.add_output(result.path)
+    print(f"Card data: {len(data_results)} pages, "
+          f"{sum(result.size for result in data_results):,} bytes (manifest: {DATA_MANIFEST})")
+    
+    # 缓存响应头: 带哈希的静态资源、卡片数据分片和首页卡片片段
+    hashed_paths = list(asset_map.values()) + [result.path for result in data_results] + (fragments or [])
+    for result in write_cache_headers(hashed_paths):
+        write_stats[result.status] += 1
+        deploy.record(result)
+    
+    # 删除已不存在的游戏对应的页面, 并保存清单
+    removed = manifest.remove_stale()
+    for filepath in removed:
+        remove_siblings(filepath)
+    manifest.save()
+    if args.incremental:
+        print(f"Incremental build: {manifest.skipped} pages not re-rendered")
+    print(f"Output files: {write_stats[WRITTEN]} written, "
+          f"{write_stats[UNCHANGED] + manifest.skipped} unchanged, {len(removed)} removed")
+    
+    # 部署清单: 增量构建中跳过的页面沿用上次的记录
+    for filepath in manifest.current:
+        deploy.carry(filepath)
+    
+    # 预压缩: 只重新压缩本次构建中发生变化的文件
+    # 不生成的预压缩文件(未使用--precompress, 或未安装brotli时的.br)全部删除, 否则服务器会继续使用旧内容
+    outputs = list(deploy.current)
+    unused_extensions = [extension for extension in SIBLING_EXTENSIONS
+                         if not args.precompress or extension not in sibling_extensions()]
+    removed_siblings = sum(remove_siblings(filepath, unused_extensions) for filepath in outputs)
+    if removed_siblings:
+        print(f"Removed {removed_siblings} precompressed files that this build does not produce")
+    if args.precompress:
+        written = precompress(outputs, jobs=args.jobs)
+        for sibling, size, digest in written:
+            deploy.record(WriteResult(sibling, WRITTEN, size, digest))
+        for filepath in outputs:
+            for extension in sibling_extensions():
+                deploy.carry(filepath + extension)
+        print(f"Precompressed {len(written)} files")
+        print_size_report(outputs)
+    
+    diff = deploy.save()
+    print(f"Deploy diff: {len(diff['added'])} added, {len(diff['changed'])} changed, "
+          f"{len(diff['deleted'])} deleted (see {DEPLOY_DIFF})")
     
     # Update all category pages
     # update_all_category_pages() # This function is not defined in the original file
@@ -1214,7 +1713,7 @@ def main():
     for category in CATEGORY_MAP:
         if category in categories:
             print(f"- games/{category.lower()}/index.html ({CATEGORY_MAP[category]} category page)")
-    print(f"- Total: {sum(len(cat_games) for cat_games in categories.values() if cat_games[0].get('category', '') in CATEGORY_MAP)} game detail pages")
+    print(f"- Total: {detail_count} game detail pages")
     print("\nYou can open index.html in your browser to access the website.")
     # check_category_links() # This function is not defined in the original file
 
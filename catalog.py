@@ -0,0 +1,457 @@
+import os
+import re
+import sys
+import json
+import html
+import pickle
+import hashlib
+
+# Define category mapping (English)
+CATEGORY_MAP = {
+    "Action": "Action",
+    "Racing": "Racing",
+    "Shooting": "Shooting",
+    "Puzzle": "Puzzle",
+    "Sports": "Sports",
+    "Casual": "Casual",
+    ".io": ".IO Games",
+    "Clicker": "Clicker",
+    "Adventure": "Adventure",
+    "Driving": "Driving",
+    "Beauty": "Beauty",
+    "Other": "Other"
+}
+
+# 按顺序查找的游戏数据文件
+CATALOG_FILES = ["games.json", "crazy_games.json"]
+
+# 按行存储(每行一个JSON对象)的数据文件扩展名
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+# 每次读取的字符数
+CHUNK_SIZE = 64 * 1024
+
+# 卡片上显示的描述长度
+CARD_DESCRIPTION_LENGTH = 100
+
+# 清理文件名(移除非法字符)
+def clean_filename(name):
+    # 使用正则表达式替换非法字符
+    # 这样避免了在f-string中使用反斜杠
+    filename = re.sub(r'[<>:"/\\|?*]', '', name)
+    filename = filename.replace(" ", "_").lower()
+    return filename
+
+# 解析游戏尺寸, 无效值返回None
+def dimension(value):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+# 游戏记录
+class Game:
+    """Compact game record; slug, page path, display category and tag HTML are computed once at load time"""
+
+    __slots__ = (
+        "game_id", "title", "category", "description", "instructions", "tags", "thumb", "url",
+        "slug", "detail_path", "category_label", "tags_html", "card_description", "thumb_variants",
+        "thumb_color", "width", "height",
+    )
+
+    def __init__(self, game_id="", title="", category="", description="", instructions="", tags=(), thumb=None, url="",
+                 width=None, height=None):
+        # 没有game_id的记录使用游戏地址或标题作为唯一标识
+        self.game_id = game_id or url or title
+        self.title = title
+        # 分类和标签在所有游戏之间大量重复, 驻留后只保存一份
+        self.category = sys.intern(category)
+        self.description = description
+        self.instructions = instructions
+        self.tags = tuple(sys.intern(tag) for tag in tags)
+        self.thumb = thumb
+        self.url = url
+        # 游戏iframe的原始尺寸
+        self.width = dimension(width)
+        self.height = dimension(height)
+        self.set_slug(clean_filename(title))
+        self.category_label = sys.intern(CATEGORY_MAP.get(category, category))
+        self.tags_html = " ".join('<span>{}</span>'.format(html.escape(tag, quote=False)) for tag in self.tags)
+        if len(description) > CARD_DESCRIPTION_LENGTH:
+            self.card_description = description[:CARD_DESCRIPTION_LENGTH] + "..."
+        else:
+            self.card_description = description
+        # 本地缩略图 {尺寸: {格式: 路径}}, 由构建脚本的缩略图处理设置
+        self.thumb_variants = None
+        # 缩略图的平均颜色, 图片加载前作为占位背景色
+        self.thumb_color = None
+
+    def set_slug(self, slug):
+        self.slug = slug
+        self.detail_path = "games/{}/{}.html".format(self.category.lower(), slug)
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(
+            game_id=record.get("game_id", ""),
+            title=record.get("title", ""),
+            category=record.get("category", ""),
+            description=record.get("description", ""),
+            instructions=record.get("instructions", ""),
+            tags=record.get("tags", []),
+            thumb=record.get("thumb"),
+            url=record.get("url", ""),
+            width=record.get("width"),
+            height=record.get("height"),
+        )
+
+    # 序列化时只保存字段值, 不重复保存字段名
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in Game.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(Game.__slots__, state):
+            setattr(self, name, value)
+
+    def has_detail_page(self):
+        return bool(self.title and self.category)
+
+    def summary(self):
+        """Return a copy without the detail-only fields, enough to render a game card"""
+        summary = Game.__new__(Game)
+        for name in Game.__slots__:
+            setattr(summary, name, getattr(self, name))
+        summary.description = None
+        summary.instructions = None
+        summary.url = None
+        return summary
+
+    def to_dict(self):
+        """Source fields of the record (derived fields are omitted)"""
+        return {
+            "game_id": self.game_id,
+            "title": self.title,
+            "category": self.category,
+            "description": self.description,
+            "instructions": self.instructions,
+            "tags": list(self.tags),
+            "thumb": self.thumb,
+            "url": self.url,
+            "width": self.width,
+            "height": self.height,
+        }
+
+# 详情页不能使用的文件名: 与分类页的index.html、pageN.html冲突
+RESERVED_SLUG = re.compile(r"^(index|page\d+)$")
+
+# slug索引: 详情页路径 -> 游戏ID
+class SlugIndex:
+    """Map every detail page path to one game and disambiguate titles that clean to the same slug.
+
+    Only games in the same category directory can collide. The owner of a contested path is the
+    game that owned it in the previous build (owners, {detail_path: game_id}) if it is still in the
+    catalog, otherwise the game with the lowest game_id, so feed order never moves an existing page.
+    """
+
+    def __init__(self, owners=None):
+        self.previous_owners = owners or {}
+        # 详情页原始路径 -> 使用该路径的所有游戏ID(由prepare统计)
+        self.claims = {}
+        self.game_ids = {}
+        self.titles = {}
+        self.collisions = []
+
+    def prepare(self, games):
+        """Record which games claim each detail path before any of them is added"""
+        for game in games:
+            self.claims.setdefault(game.detail_path, set()).add(game.game_id)
+
+    def owner(self, path):
+        claims = self.claims.get(path)
+        if not claims:
+            return None
+        previous = self.previous_owners.get(path)
+        return previous if previous in claims else min(claims)
+
+    def add(self, game):
+        """Register game, renaming its slug deterministically if another game owns its page path"""
+        path = game.detail_path
+        owner = self.owner(path)
+        if owner is None:
+            # 未调用prepare时, 先出现的游戏使用原路径
+            owner = self.game_ids.get(path)
+        if RESERVED_SLUG.match(game.slug):
+            owner = "category page"
+        if owner is not None and owner != game.game_id:
+            # 其他游戏使用"slug_游戏ID哈希"作为文件名, 同一个游戏每次得到相同的结果
+            base = game.slug
+            suffix = hashlib.sha1(game.game_id.encode("utf-8")).hexdigest()[:6]
+            game.set_slug(f"{base}_{suffix}")
+            while self.game_ids.get(game.detail_path, game.game_id) != game.game_id:
+                suffix = hashlib.sha1(suffix.encode("utf-8")).hexdigest()[:6]
+                game.set_slug(f"{base}_{suffix}")
+            self.collisions.append((path, owner, game.game_id, game.detail_path))
+        self.game_ids[game.detail_path] = game.game_id
+        self.titles[game.detail_path] = game.title
+        return game.slug
+
+    def owners(self):
+        """{detail_path: game_id} of every registered game, saved for the next build"""
+        return dict(self.game_ids)
+
+    def game_id(self, detail_path):
+        return self.game_ids.get(detail_path)
+
+    def title(self, detail_path):
+        return self.titles.get(detail_path)
+
+    def report_collisions(self):
+        for path, owner, game_id, renamed in self.collisions:
+            print(f"Page collision: '{path}' belongs to {owner}; {game_id} renamed to '{renamed}'")
+
+# 查找游戏数据文件
+def find_catalog(candidates=CATALOG_FILES):
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    return None
+
+NUMBER_CHARS = frozenset("0123456789+-.eE")
+
+def partial_number(item, buf, end):
+    if end == len(buf):
+        return True
+    if isinstance(item, bool) or not isinstance(item, (int, float)):
+        return False
+    return all(c in NUMBER_CHARS for c in buf[end:])
+
+# 逐个读取JSON数组中的元素, 不需要一次性载入整个文件
+def iter_json_array(f, chunk_size=CHUNK_SIZE):
+    """Yield the elements of the top-level JSON array in file object f one at a time"""
+    decoder = json.JSONDecoder()
+    buf = f.read(chunk_size)
+    eof = not buf
+    pos = 0
+
+    def skip(buf, pos, chars):
+        while pos < len(buf) and buf[pos] in chars:
+            pos += 1
+        return pos
+
+    # 跳过开头的空白(包括BOM), 找到数组的起始位置
+    while True:
+        pos = skip(buf, pos, " \t\r\n\ufeff")
+        if pos < len(buf) or eof:
+            break
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buf, pos = buf[pos:] + chunk, 0
+    if pos >= len(buf) or buf[pos] != "[":
+        raise ValueError("game data must be a JSON array")
+    pos += 1
+    expect_value = True
+    empty = True
+
+    while True:
+        pos = skip(buf, pos, " \t\r\n")
+        if pos < len(buf):
+            if buf[pos] == "]":
+                # 与json.load一致, 不接受结尾多余的逗号
+                if expect_value and not empty:
+                    raise ValueError("trailing ',' in JSON array")
+                # 与json.load一致, 数组之后只允许空白
+                rest = buf[pos + 1:]
+                while True:
+                    if rest.strip(" \t\r\n"):
+                        raise ValueError("extra data after JSON array")
+                    if eof:
+                        return
+                    rest = f.read(chunk_size)
+                    eof = not rest
+            if buf[pos] == "," and not expect_value:
+                pos += 1
+                expect_value = True
+                continue
+            if expect_value:
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    # 元素不完整, 需要继续读取
+                    if eof:
+                        raise
+                    end = None
+                # 数字后面只剩下可能属于数字的字符时(例如 "2." 或 "1e"), 数字可能还未读完
+                if end is not None and (eof or not partial_number(item, buf, end)):
+                    yield item
+                    pos = end
+                    expect_value = False
+                    empty = False
+                    continue
+            else:
+                raise ValueError(f"expected ',' or ']' in JSON array, got {buf[pos]!r}")
+        elif eof:
+            raise ValueError("unexpected end of JSON array")
+        # 读取下一块并丢弃已处理的内容
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buf, pos = buf[pos:] + chunk, 0
+
+# 逐行读取NDJSON
+def iter_ndjson(f):
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+# 解析游戏数据文件, 逐个返回原始记录
+def parse_records(path):
+    """Yield raw game dicts from a JSON array or NDJSON file without loading it whole"""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.lower().endswith(NDJSON_EXTENSIONS):
+            yield from iter_ndjson(f)
+        else:
+            yield from iter_json_array(f)
+
+# 解析游戏数据文件, 逐个返回Game记录
+def parse_games(path):
+    for record in parse_records(path):
+        yield Game.from_record(record)
+
+# 二进制快照: 解析后的记录保存在数据文件旁边, 数据文件未变化时直接读取快照
+SNAPSHOT_VERSION = 1
+
+# 快照格式标识: Game的字段或分类映射变化后旧快照自动失效
+SNAPSHOT_SCHEMA = repr((SNAPSHOT_VERSION, Game.__slots__, sorted(CATEGORY_MAP.items())))
+
+# 各类快照的解析函数
+SNAPSHOT_PARSERS = {
+    "records": parse_records,
+    "games": parse_games,
+}
+
+def snapshot_path(path, kind):
+    return f"{path}.{kind}.snapshot"
+
+# 计算文件的SHA-256
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# 打开有效的快照, 快照不存在或已过期时返回None
+def open_snapshot(path, kind):
+    """Return the snapshot file positioned after its header if it matches the source file"""
+    try:
+        f = open(snapshot_path(path, kind), "rb")
+    except OSError:
+        return None
+    try:
+        header = pickle.load(f)
+        st = os.stat(path)
+        # 修改时间和大小相同时直接使用; 只有修改时间不同时再比较内容哈希
+        if (header.get("schema") == SNAPSHOT_SCHEMA and header.get("kind") == kind
+                and header.get("size") == st.st_size
+                and (header.get("mtime_ns") == st.st_mtime_ns or header.get("sha256") == file_sha256(path))):
+            return f
+    except Exception as e:
+        print(f"Ignoring unreadable snapshot for {path}: {e}")
+    f.close()
+    return None
+
+# 从快照逐个读取记录
+def iter_snapshot(f):
+    with f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+# 解析数据文件, 同时写入新的快照; 快照无法写入时(例如只读目录)只解析不保存
+def parse_and_snapshot(path, kind):
+    snap = snapshot_path(path, kind)
+    # 临时文件名包含进程号和随机数, 多个脚本同时读取同一数据文件时互不影响
+    tmp = f"{snap}.{os.getpid()}.{os.urandom(4).hex()}.tmp"
+    st = os.stat(path)
+    header = {
+        "schema": SNAPSHOT_SCHEMA,
+        "kind": kind,
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "sha256": file_sha256(path),
+    }
+    try:
+        f = open(tmp, "wb")
+        pickle.dump(header, f, pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        print(f"Not writing snapshot for {path}: {e}")
+        f = None
+    complete = False
+    try:
+        for item in SNAPSHOT_PARSERS[kind](path):
+            if f is not None:
+                try:
+                    pickle.dump(item, f, pickle.HIGHEST_PROTOCOL)
+                except OSError as e:
+                    print(f"Not writing snapshot for {path}: {e}")
+                    f.close()
+                    f = None
+                    remove_quietly(tmp)
+            yield item
+        complete = True
+    finally:
+        if f is not None:
+            try:
+                f.close()
+                # 只保存完整读取且读取期间未被修改的数据文件的快照
+                if complete and os.stat(path).st_mtime_ns == st.st_mtime_ns:
+                    os.replace(tmp, snap)
+            except OSError as e:
+                print(f"Not writing snapshot for {path}: {e}")
+            remove_quietly(tmp)
+
+def remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def iter_cached(path, kind, use_cache=True):
+    if not use_cache:
+        return SNAPSHOT_PARSERS[kind](path)
+    f = open_snapshot(path, kind)
+    if f is not None:
+        return iter_snapshot(f)
+    return parse_and_snapshot(path, kind)
+
+# 逐个读取原始记录(字典), 用于需要修改并写回数据文件的脚本
+def iter_records(path, use_cache=True):
+    """Yield raw game dicts, from the binary snapshot when the source file is unchanged"""
+    return iter_cached(path, "records", use_cache)
+
+# 逐个读取游戏记录, 同时建立slug索引
+# 先读一遍统计每个详情页路径的所有游戏(使用快照时很快), 路径的归属因此与游戏在数据中的顺序无关
+def iter_games(path, use_cache=True, slug_index=None):
+    """Yield Game records, from the binary snapshot when the source file is unchanged"""
+    if slug_index is None:
+        slug_index = SlugIndex()
+    slug_index.prepare(iter_cached(path, "games", use_cache))
+    for game in iter_cached(path, "games", use_cache):
+        slug_index.add(game)
+        yield game
+
+def load_records(path, use_cache=True):
+    return list(iter_records(path, use_cache))
+
+def load_games(path, use_cache=True, slug_index=None):
+    return list(iter_games(path, use_cache, slug_index))
+
+# 只建立slug索引(不保留游戏记录); owners为上次构建保存的详情页归属
+def load_slug_index(path, use_cache=True, owners=None):
+    slug_index = SlugIndex(owners)
+    for _ in iter_games(path, use_cache, slug_index):
+        pass
+    return slug_index
@@ -1,21 +1,20 @@
-import json
+from catalog import load_games
 
 # 读取游戏数据
-with open('game_data.json', 'r', encoding='utf-8') as f:
-    games = json.load(f)
+games = load_games('game_data.json')
 
 # 打印前5个游戏的分类和标签
 print('示例游戏分类:')
 for i, game in enumerate(games[:5]):
-    title = game['title']
-    category = game['category']
-    tags = ', '.join(game['tags'])
+    title = game.title
+    category = game.category
+    tags = ', '.join(game.tags)
     print(f"{i+1}. {title}: {category}, 标签: {tags}")
 
 # 统计每个分类的游戏数量
 category_counts = {}
 for game in games:
-    cat = game['category']
+    cat = game.category
     if cat in category_counts:
         category_counts[cat] += 1
     else:
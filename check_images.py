@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import os
 import glob
-import requests
+import threading
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse, urljoin
 import time
@@ -10,15 +10,31 @@ import concurrent.futures
 import json
 import random
 
+from catalog import CATALOG_FILES, find_catalog, load_records, load_slug_index
+from remote_check import RemoteChecker, ResultCache
+
+# 远程图片检查结果缓存(位于网站根目录)
+CHECK_CACHE_FILE = '.image_check_cache.json'
+
 class ImageChecker:
-    def __init__(self, base_dir='.', category_dir=None, timeout=3):
+    def __init__(self, base_dir='.', category_dir=None, timeout=3, slug_index=None, remote_options=None, workers=10,
+                 cache_path=None):
         self.base_dir = os.path.abspath(base_dir)
         self.category_dir = category_dir  # 新增：特定分类目录
+        self.slug_index = slug_index  # 详情页文件名 -> 游戏
         self.timeout = timeout
+        # 远程检查参数(每个域名的并发数、速率、重试次数等), 见 remote_check.RemoteChecker
+        self.remote_options = remote_options or {}
+        self.workers = workers
+        self.cache_path = cache_path or os.path.join(self.base_dir, CHECK_CACHE_FILE)
+        # 远程URL -> 引用它的所有图片 [(分类, 错误记录)], 扫描完所有页面后每个URL只检查一次
+        self.references = defaultdict(list)
         self.errors = defaultdict(list)
         self.total_images = 0
         self.failed_images = 0
         self.processed_files = 0
+        # 多个线程同时更新计数和错误列表
+        self.lock = threading.Lock()
         
     def is_valid_local_file(self, src, html_path):
         """检查本地文件是否存在"""
@@ -33,13 +49,10 @@ class ImageChecker:
             
         return os.path.exists(full_path), full_path
     
-    def is_valid_remote_url(self, url):
-        """检查远程URL是否可访问"""
-        try:
-            response = requests.head(url, timeout=self.timeout, allow_redirects=True)
-            return response.status_code == 200, response.status_code
-        except requests.exceptions.RequestException as e:
-            return False, str(e)
+    def add_error(self, category, error):
+        with self.lock:
+            self.failed_images += 1
+            self.errors[category].append(error)
     
     def get_category_from_path(self, path):
         """从文件路径中提取游戏分类"""
@@ -53,7 +66,12 @@ class ImageChecker:
     def get_game_name(self, path):
         """从文件路径中提取游戏名称"""
         filename = os.path.basename(path)
-        return os.path.splitext(filename)[0]
+        slug = os.path.splitext(filename)[0]
+        # 通过slug索引找到详情页(games/<分类>/<slug>.html)对应的游戏
+        detail_path = os.path.relpath(os.path.abspath(path), self.base_dir).replace(os.sep, '/')
+        if self.slug_index is not None and self.slug_index.title(detail_path):
+            return self.slug_index.title(detail_path)
+        return slug
     
     def process_html_file(self, html_path):
         """处理单个HTML文件，提取和检查所有图片"""
@@ -72,24 +90,21 @@ class ImageChecker:
                 if not src:
                     continue
                 
-                self.total_images += 1
+                with self.lock:
+                    self.total_images += 1
                 
                 # 区分本地文件和远程URL
                 if src.startswith(('http://', 'https://')):
-                    is_valid, status = self.is_valid_remote_url(src)
-                    if not is_valid:
-                        self.failed_images += 1
-                        self.errors[category].append({
+                    with self.lock:
+                        self.references[src].append((category, {
                             'src': src,
                             'game': game_name,
                             'page': html_path,
-                            'error': f"远程URL无效 (状态: {status})"
-                        })
+                        }))
                 else:
                     is_valid, full_path = self.is_valid_local_file(src, html_path)
                     if not is_valid:
-                        self.failed_images += 1
-                        self.errors[category].append({
+                        self.add_error(category, {
                             'src': src,
                             'game': game_name,
                             'page': html_path,
@@ -101,6 +116,43 @@ class ImageChecker:
             print(f"处理文件 {html_path} 时出错: {e}")
             return 0
     
+    def check_remote_urls(self):
+        """检查所有页面引用的远程URL: 每个URL只检查一次, 使用缓存并对过期记录发送条件请求"""
+        cache = ResultCache(self.cache_path)
+        statuses = {}
+        pending = []
+        for url in self.references:
+            entry = cache.fresh(url)
+            if entry:
+                statuses[url] = (entry['ok'], entry['status'])
+            else:
+                pending.append((url, cache.validators(url)))
+        revalidated = sum(1 for _, headers in pending if headers)
+        
+        with RemoteChecker(timeout=self.timeout, **self.remote_options) as remote:
+            results = remote.check_many(pending)
+        
+        unchanged = 0
+        for (url, headers), result in zip(pending, results):
+            if result.status == 304:
+                unchanged += 1
+            entry = cache.store(url, result)
+            statuses[url] = (entry['ok'], entry['status']) if entry else (result.ok, result.status)
+        cache.save()
+        
+        # 错误归属到引用该URL的每个页面
+        for url, refs in self.references.items():
+            is_valid, status = statuses[url]
+            if not is_valid:
+                for category, error in refs:
+                    self.add_error(category, dict(error, error=f"远程URL无效 (状态: {status})"))
+        
+        references = sum(len(refs) for refs in self.references.values())
+        print(f"远程图片: {references} 处引用, {len(self.references)} 个不同URL, "
+              f"缓存有效 {len(self.references) - len(pending)} 个, 重新验证 {revalidated} 个(未变化 {unchanged} 个), "
+              f"新检查 {len(pending) - revalidated} 个")
+        print(f"远程请求: {remote.stats['requests']} 次, 新建连接 {remote.stats['connections']} 个, 重试 {remote.stats['retries']} 次")
+    
     def scan_directory(self):
         """递归扫描目录，查找所有HTML文件并处理"""
         # 修改：根据是否指定了分类目录来确定扫描路径
@@ -120,9 +172,10 @@ class ImageChecker:
         
         start_time = time.time()
         
-        # 使用线程池加速处理
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
+        # 线程池解析HTML并检查本地图片, 远程URL去重后由事件循环通过连接池检查(每个域名限制并发和速率)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
             results = list(executor.map(self.process_html_file, html_files))
+        self.check_remote_urls()
         
         self.processed_files = len(html_files)
         
@@ -228,7 +281,20 @@ def main():
         else:
             base_dir = '.'
     
-    checker = ImageChecker(base_dir=base_dir, category_dir=specific_dir)
+    # 读取游戏数据建立slug索引, 用于把详情页对应到游戏
+    catalog_path = find_catalog([os.path.join(base_dir, name) for name in CATALOG_FILES])
+    # 使用网站上次构建时的详情页归属, 与生成的页面保持一致
+    owners = {}
+    manifest_path = os.path.join(base_dir, '.build_manifest.json')
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                owners = json.load(f).get('page_owners', {})
+        except (OSError, ValueError) as e:
+            print(f"无法读取构建清单 {manifest_path}: {e}")
+    slug_index = load_slug_index(catalog_path, owners=owners) if catalog_path else None
+    
+    checker = ImageChecker(base_dir=base_dir, category_dir=specific_dir, slug_index=slug_index)
     checker.scan_directory()
     checker.generate_report()
     
@@ -271,8 +337,7 @@ tags_by_category = {
 }
 
 # 读取游戏数据
-with open('game_data.json', 'r', encoding='utf-8') as f:
-    games = json.load(f)
+games = load_records('game_data.json')
 
 # 添加分类和标签
 for game in games:
@@ -0,0 +1,126 @@
+import os
+import re
+import gzip
+import hashlib
+import multiprocessing
+from collections import OrderedDict
+
+# brotli是可选依赖, 未安装时只生成.gz
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 需要预压缩的文件类型
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".json")
+
+# 预压缩文件的扩展名(与nginx的gzip_static/brotli_static对应)
+SIBLING_EXTENSIONS = (".gz", ".br")
+
+# 页面类型(用于压缩统计)
+HOMEPAGE_FILE = re.compile(r"^(index|page\d+)\.html$")
+CATEGORY_FILE = re.compile(r"^games/[^/]+/(index|page\d+)\.html$")
+
+def page_type(path):
+    if HOMEPAGE_FILE.match(path):
+        return "homepage"
+    if CATEGORY_FILE.match(path):
+        return "category"
+    if path.startswith("games/") and path.endswith(".html"):
+        return "detail"
+    return os.path.splitext(path)[1].lstrip(".") or "other"
+
+def sibling_extensions():
+    """Sibling extensions produced in this environment (.br only when brotli is installed)"""
+    if brotli is None:
+        return SIBLING_EXTENSIONS[:1]
+    return SIBLING_EXTENSIONS
+
+def is_compressible(path):
+    return path.endswith(COMPRESSIBLE_EXTENSIONS)
+
+# 预压缩文件不存在或不比源文件新时需要重新生成
+def is_stale(path, sibling):
+    try:
+        return os.stat(sibling).st_mtime_ns <= os.stat(path).st_mtime_ns
+    except OSError:
+        return True
+
+def compress(data, extension):
+    if extension == ".gz":
+        # mtime固定为0, 相同内容每次得到完全相同的文件
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data, mode=brotli.MODE_TEXT, quality=11)
+
+# 生成一个文件的预压缩版本, 返回[(预压缩文件路径, 大小, SHA-256)]
+def compress_file(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    results = []
+    for extension in sibling_extensions():
+        sibling = path + extension
+        if not is_stale(path, sibling):
+            continue
+        compressed = compress(data, extension)
+        tmp = sibling + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp, sibling)
+        results.append((sibling, len(compressed), hashlib.sha256(compressed).hexdigest()))
+    return results
+
+def precompress(paths, jobs=1):
+    """Write maximum-level .gz/.br siblings for the files in paths whose siblings are missing or older.
+
+    Returns a list of (sibling path, size, sha256) for every sibling written.
+    """
+    extensions = sibling_extensions()
+    stale = [path for path in paths
+             if is_compressible(path) and os.path.exists(path)
+             and any(is_stale(path, path + extension) for extension in extensions)]
+    written = []
+    if jobs > 1 and len(stale) > 1:
+        jobs = min(jobs, len(stale))
+        chunksize = max(1, len(stale) // (jobs * 4))
+        with multiprocessing.Pool(jobs) as pool:
+            for results in pool.imap_unordered(compress_file, stale, chunksize):
+                written.extend(results)
+    else:
+        for path in stale:
+            written.extend(compress_file(path))
+    return written
+
+# 删除预压缩文件: 源文件已删除, 或本次构建不生成该类预压缩文件(避免服务器使用过期内容); 返回删除的数量
+def remove_siblings(path, extensions=SIBLING_EXTENSIONS):
+    removed = 0
+    for extension in extensions:
+        sibling = path + extension
+        if os.path.exists(sibling):
+            os.remove(sibling)
+            print(f"Removed file: {sibling}")
+            removed += 1
+    return removed
+
+# 按页面类型统计原始大小和压缩后大小
+def size_report(paths):
+    totals = OrderedDict()
+    for path in sorted(paths, key=page_type):
+        if not is_compressible(path) or not os.path.exists(path):
+            continue
+        row = totals.setdefault(page_type(path), {"files": 0, "raw": 0, ".gz": 0, ".br": 0})
+        row["files"] += 1
+        row["raw"] += os.path.getsize(path)
+        for extension in SIBLING_EXTENSIONS:
+            if os.path.exists(path + extension):
+                row[extension] += os.path.getsize(path + extension)
+    return totals
+
+def print_size_report(paths):
+    totals = size_report(paths)
+    print(f"{'Type':<10} {'Files':>6} {'Raw':>12} {'gzip':>19} {'brotli':>19}")
+    for name, row in totals.items():
+        raw = row["raw"] or 1
+        print(f"{name:<10} {row['files']:>6} {row['raw']:>12,} "
+              f"{row['.gz']:>12,} ({row['.gz'] / raw:4.0%}) {row['.br']:>12,} ({row['.br'] / raw:4.0%})")
+    if brotli is None:
+        print("brotli is not installed; only .gz files were written (pip install brotli)")
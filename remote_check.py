@@ -0,0 +1,382 @@
+import os
+import ssl
+import json
+import time
+import random
+import asyncio
+import threading
+from collections import Counter, namedtuple
+from urllib.parse import quote, urljoin, urlsplit
+
+# 每个域名同时进行的请求数
+MAX_PER_HOST = 8
+
+# 每个域名的请求速率(令牌桶): 每秒请求数和允许的突发请求数
+REQUESTS_PER_SECOND = 20
+BURST = 10
+
+# 失败重试次数和退避时间(秒): 第N次重试前等待 BACKOFF * 2**(N-1), 加上随机抖动
+RETRIES = 3
+BACKOFF = 0.5
+
+# 服务器要求等待(Retry-After)时最多等待的秒数
+MAX_RETRY_AFTER = 30
+
+MAX_REDIRECTS = 5
+
+# 需要重试的状态码
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+# HEAD被拒绝时改用 GET + Range: bytes=0-0 (部分CDN不支持HEAD)
+HEAD_REFUSED_STATUSES = frozenset([403, 405, 501])
+
+REDIRECT_STATUSES = frozenset([301, 302, 303, 307, 308])
+
+# 响应体小于此大小时读取丢弃以复用连接, 否则关闭连接
+MAX_DRAIN = 64 * 1024
+
+USER_AGENT = "gunracing-image-checker/1.0"
+
+# 请求行中不需要编码的字符(已有的%编码保持不变), 其余字符(例如中文路径)按UTF-8进行%编码
+PATH_SAFE = "/%:@!$&'()*+,;=~"
+QUERY_SAFE = PATH_SAFE + "?"
+
+# 检查结果: status为HTTP状态码或错误信息, headers为最后一个响应的响应头(小写名称)
+CheckResult = namedtuple("CheckResult", ["ok", "status", "headers"])
+
+Response = namedtuple("Response", ["status", "headers", "keep_alive"])
+
+class ProtocolError(Exception):
+    pass
+
+# 令牌桶: 以固定速率补充令牌, 每个请求消耗一个令牌
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+# 一个域名的连接池: 空闲的keep-alive连接、并发上限和速率限制
+class HostPool:
+    def __init__(self, limit, rate, burst):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.bucket = TokenBucket(rate, burst)
+        self.idle = []
+
+class RemoteChecker:
+    """Check remote URLs over pooled keep-alive HTTP/1.1 connections on an asyncio event loop.
+
+    Requests to one host share its idle connections and are limited by a per-host semaphore
+    and token bucket. Refused HEAD requests fall back to a one-byte ranged GET, and
+    connection errors, timeouts, 429 and 5xx responses are retried with exponential backoff.
+    """
+
+    def __init__(self, timeout=10, max_per_host=MAX_PER_HOST, rate=REQUESTS_PER_SECOND, burst=BURST,
+                 retries=RETRIES, backoff=BACKOFF):
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+        self.rate = rate
+        self.burst = burst
+        self.retries = retries
+        self.backoff = backoff
+        self.pools = {}
+        self.ssl_context = ssl.create_default_context()
+        # 统计: 请求数、新建连接数、重试次数
+        self.stats = Counter()
+        self.loop = None
+        self.thread = None
+
+    def pool(self, key):
+        if key not in self.pools:
+            self.pools[key] = HostPool(self.max_per_host, self.rate, self.burst)
+        return self.pools[key]
+
+    async def connect(self, scheme, host, port):
+        self.stats["connections"] += 1
+        if scheme == "https":
+            return await asyncio.open_connection(host, port, ssl=self.ssl_context, server_hostname=host)
+        return await asyncio.open_connection(host, port)
+
+    async def send(self, conn, method, head):
+        reader, writer = conn
+        writer.write(head)
+        await writer.drain()
+        return await read_response(reader, method)
+
+    async def request(self, method, url, headers=None):
+        """Send one request over a pooled connection and return a Response (the body is discarded)"""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ProtocolError(f"unsupported URL {url}")
+        # 端口无效或域名无法编码时在取得连接之前抛出ValueError
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        head = request_head(method, parts, headers or {})
+        pool = self.pool((parts.scheme, parts.hostname, port))
+        async with pool.semaphore:
+            await pool.bucket.acquire()
+            self.stats["requests"] += 1
+            while True:
+                reused = bool(pool.idle)
+                if reused:
+                    conn = pool.idle.pop()
+                else:
+                    conn = await asyncio.wait_for(self.connect(parts.scheme, parts.hostname, port), self.timeout)
+                try:
+                    response = await asyncio.wait_for(self.send(conn, method, head), self.timeout)
+                except (OSError, ProtocolError, asyncio.IncompleteReadError):
+                    conn[1].close()
+                    # 空闲连接可能已被服务器关闭, 换一个连接重发, 不计入重试
+                    if reused:
+                        continue
+                    raise
+                except asyncio.TimeoutError:
+                    conn[1].close()
+                    raise
+                if response.keep_alive:
+                    pool.idle.append(conn)
+                else:
+                    conn[1].close()
+                return response
+
+    # 发送请求, 遇到连接错误、超时和429/5xx时按指数退避重试
+    async def request_with_retries(self, method, url, headers=None):
+        attempt = 0
+        while True:
+            try:
+                response = await self.request(method, url, headers)
+                if response.status not in RETRY_STATUSES or attempt >= self.retries:
+                    return response
+                delay = retry_after(response.headers)
+            except (OSError, ProtocolError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                if attempt >= self.retries:
+                    raise
+                delay = None
+            attempt += 1
+            self.stats["retries"] += 1
+            if delay is None:
+                delay = self.backoff * 2 ** (attempt - 1) * (1 + random.random() / 2)
+            await asyncio.sleep(delay)
+
+    async def check_async(self, url, headers=None):
+        """Return a CheckResult for url, following redirects.
+
+        headers may carry If-None-Match/If-Modified-Since validators; a 304 then counts as ok.
+        """
+        headers = headers or {}
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                response = await self.request_with_retries("HEAD", url, headers)
+                if response.status in HEAD_REFUSED_STATUSES:
+                    response = await self.request_with_retries("GET", url, dict(headers, Range="bytes=0-0"))
+                location = response.headers.get("location")
+                if response.status in REDIRECT_STATUSES and location:
+                    url = urljoin(url, location)
+                    continue
+                ok = response.status in (200, 206) or (response.status == 304 and bool(headers))
+                return CheckResult(ok, response.status, response.headers)
+            return CheckResult(False, "too many redirects", {})
+        except asyncio.TimeoutError:
+            return CheckResult(False, f"timed out after {self.timeout}s", {})
+        except (OSError, ProtocolError, asyncio.IncompleteReadError) as e:
+            return CheckResult(False, str(e) or type(e).__name__, {})
+        except ValueError as e:
+            # URL无法发送(例如端口无效或域名无法编码), 包括UnicodeError
+            return CheckResult(False, f"invalid URL: {e}", {})
+
+    async def close_async(self):
+        for pool in self.pools.values():
+            for _, writer in pool.idle:
+                writer.close()
+            pool.idle = []
+
+    # 在后台线程中运行事件循环, 供多个线程同时调用check
+    def start(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def check(self, url):
+        """Thread-safe blocking wrapper around check_async"""
+        return asyncio.run_coroutine_threadsafe(self.check_async(url), self.loop).result()
+
+    def check_many(self, requests):
+        """Check [(url, headers), ...] concurrently and return the CheckResults in the same order.
+
+        An unexpected error while checking one URL becomes a failed CheckResult for that URL
+        instead of aborting the whole batch.
+        """
+        async def check_all():
+            return await asyncio.gather(*[self.check_async(url, headers) for url, headers in requests],
+                                        return_exceptions=True)
+        results = asyncio.run_coroutine_threadsafe(check_all(), self.loop).result()
+        return [CheckResult(False, f"{type(result).__name__}: {result}", {}) if isinstance(result, Exception) else result
+                for result in results]
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.close_async(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+# 检查结果的有效期(秒): 可访问的图片1天, 返回错误状态码的图片1小时; 连接错误不缓存
+CACHE_TTL = 24 * 3600
+FAILED_CACHE_TTL = 3600
+
+class ResultCache:
+    """On-disk cache of remote check results keyed by URL.
+
+    Each entry stores the status, ETag/Last-Modified and an expiry time. Fresh entries are
+    used as they are; stale ones are revalidated with a conditional request.
+    """
+
+    def __init__(self, path, ttl=CACHE_TTL, failed_ttl=FAILED_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.failed_ttl = failed_ttl
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable check cache {path}: {e}")
+                entries = {}
+            # 忽略格式不正确的记录(重新检查这些URL), 不让一条坏记录中断整个扫描
+            if isinstance(entries, dict):
+                self.entries = {url: entry for url, entry in entries.items() if valid_entry(entry)}
+
+    def fresh(self, url, now=None):
+        """Return the cached entry for url if it has not expired"""
+        entry = self.entries.get(url)
+        if entry and entry["expires"] > (now or time.time()):
+            return entry
+        return None
+
+    def validators(self, url):
+        """Conditional request headers for a stale entry of a URL that was reachable"""
+        entry = self.entries.get(url)
+        headers = {}
+        if entry and entry["ok"]:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, result, now=None):
+        """Record a CheckResult and return the new entry; connection errors are not cached"""
+        now = now or time.time()
+        if not isinstance(result.status, int):
+            self.entries.pop(url, None)
+            return None
+        old = self.entries.get(url, {})
+        entry = {
+            "ok": result.ok,
+            "status": result.status,
+            # 304响应可能不带验证器, 沿用上次的值
+            "etag": result.headers.get("etag") or (old.get("etag") if result.status == 304 else None),
+            "last_modified": result.headers.get("last-modified") or (old.get("last_modified") if result.status == 304 else None),
+            "expires": now + (self.ttl if result.ok else self.failed_ttl),
+        }
+        if result.status == 304:
+            entry["status"] = old.get("status", 200)
+        self.entries[url] = entry
+        return entry
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+# 请求行和请求头
+def request_head(method, parts, headers):
+    target = quote(parts.path or "/", safe=PATH_SAFE)
+    if parts.query:
+        target += "?" + quote(parts.query, safe=QUERY_SAFE)
+    default_port = 443 if parts.scheme == "https" else 80
+    # 国际化域名使用IDNA编码
+    hostname = parts.hostname.encode("idna").decode("ascii")
+    host = hostname if parts.port in (None, default_port) else f"{hostname}:{parts.port}"
+    lines = [f"{method} {target} HTTP/1.1", f"Host: {host}", f"User-Agent: {USER_AGENT}",
+             "Accept: image/*,*/*;q=0.8", "Connection: keep-alive"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+def valid_entry(entry):
+    return (isinstance(entry, dict) and isinstance(entry.get("ok"), bool)
+            and isinstance(entry.get("status"), int) and isinstance(entry.get("expires"), (int, float)))
+
+# Retry-After中的秒数(不支持HTTP日期格式)
+def retry_after(headers):
+    value = headers.get("retry-after", "")
+    if value.isdigit():
+        return min(int(value), MAX_RETRY_AFTER)
+    return None
+
+# 读取状态行和响应头, 丢弃响应体; 无法确定响应体长度或响应体过大时不复用连接
+async def read_response(reader, method):
+    line = await reader.readline()
+    if not line:
+        raise ProtocolError("connection closed by server")
+    parts = line.decode("latin-1").split(None, 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+        raise ProtocolError(f"malformed status line {line[:80]!r}")
+    version, status = parts[0], int(parts[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n"):
+            break
+        if not line:
+            raise ProtocolError("connection closed while reading headers")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+    if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+        return Response(status, headers, keep_alive)
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        return Response(status, headers, keep_alive and await drain_chunked(reader))
+    length = headers.get("content-length", "")
+    if length.isdigit() and int(length) <= MAX_DRAIN:
+        await reader.readexactly(int(length))
+        return Response(status, headers, keep_alive)
+    return Response(status, headers, False)
+
+async def drain_chunked(reader):
+    total = 0
+    while True:
+        line = await reader.readline()
+        try:
+            size = int(line.split(b";")[0].strip(), 16)
+        except ValueError:
+            raise ProtocolError(f"malformed chunk size {line[:80]!r}")
+        if size == 0:
+            # 跳过trailer直到空行
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            return True
+        total += size
+        if total > MAX_DRAIN:
+            return False
+        await reader.readexactly(size + 2)
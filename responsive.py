@@ -0,0 +1,90 @@
+import re
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+# 各尺寸图片在srcset中提供的宽度
+SRCSET_WIDTHS = {
+    "card": (160, 320, 480),
+    "detail": (320, 640, 960),
+}
+
+# 图片在页面中的显示宽度: 手机上卡片两列, 桌面上约320px; 详情页大屏幕上占内容区域的一半
+SRCSET_SIZES = {
+    "card": "(max-width: 768px) 50vw, 320px",
+    "detail": "(min-width: 992px) calc(50vw - 115px), 100vw",
+}
+
+# crazygames: 图片服务根据width参数缩放, 例如 ...-cover?metadata=none&quality=85&width=273&fit=crop
+def crazygames_candidates(parsed, widths):
+    if parsed.netloc != "imgs.crazygames.com":
+        return None
+    query = parse_qsl(parsed.query, keep_blank_values=True)
+    if not any(key == "width" for key, _ in query):
+        query.append(("width", ""))
+    candidates = []
+    for width in widths:
+        resized = [(key, width if key == "width" else value) for key, value in query]
+        candidates.append((parsed._replace(query=urlencode(resized)).geturl(), width))
+    return candidates
+
+# crazygames封面的宽高比在路径中, 例如 <slug>_16x9/<版本>/<slug>_16x9-cover 或 games/<slug>/cover_16x9-<时间>.png
+CRAZYGAMES_ASPECT = re.compile(r"_(\d+)x(\d+)(?!\d)")
+
+def crazygames_dimensions(parsed):
+    if parsed.netloc != "imgs.crazygames.com":
+        return None
+    aspect = CRAZYGAMES_ASPECT.search(parsed.path.rsplit("/", 1)[-1])
+    width = dict(parse_qsl(parsed.query)).get("width", "")
+    if not aspect or not width.isdigit():
+        return None
+    aspect_width, aspect_height = int(aspect.group(1)), int(aspect.group(2))
+    if not aspect_width:
+        return None
+    return int(width), round(int(width) * aspect_height / aspect_width)
+
+# gamedistribution: 只提供固定尺寸的图片, 文件名以 -宽x高 结尾, 例如 <id>-512x384.jpg
+GAMEDISTRIBUTION_VARIANT = re.compile(r"-\d+x\d+(\.\w+)$")
+GAMEDISTRIBUTION_SIZES = [(200, 120), (512, 384)]
+
+def gamedistribution_candidates(parsed, widths):
+    if parsed.netloc != "img.gamedistribution.com" or not GAMEDISTRIBUTION_VARIANT.search(parsed.path):
+        return None
+    return [
+        (parsed._replace(path=GAMEDISTRIBUTION_VARIANT.sub(rf"-{width}x{height}\1", parsed.path)).geturl(), width)
+        for width, height in GAMEDISTRIBUTION_SIZES
+    ]
+
+def gamedistribution_dimensions(parsed):
+    if parsed.netloc != "img.gamedistribution.com":
+        return None
+    match = re.search(r"-(\d+)x(\d+)\.\w+$", parsed.path)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+# 按图片域名选择URL改写规则和读取图片尺寸的规则
+PROVIDERS = [crazygames_candidates, gamedistribution_candidates]
+DIMENSION_PROVIDERS = [crazygames_dimensions, gamedistribution_dimensions]
+
+@lru_cache(maxsize=None)
+def responsive_image(url, size):
+    """Return (srcset, sizes) for a remote thumbnail, or None if its CDN cannot resize it"""
+    if not url:
+        return None
+    parsed = urlparse(url)
+    for provider in PROVIDERS:
+        candidates = provider(parsed, SRCSET_WIDTHS[size])
+        if candidates:
+            srcset = ", ".join(f"{candidate} {width}w" for candidate, width in candidates)
+            return srcset, SRCSET_SIZES[size]
+    return None
+
+@lru_cache(maxsize=None)
+def image_dimensions(url):
+    """Return the (width, height) a remote thumbnail URL is served at, or None if its CDN does not say"""
+    if not url:
+        return None
+    parsed = urlparse(url)
+    for provider in DIMENSION_PROVIDERS:
+        dimensions = provider(parsed)
+        if dimensions:
+            return dimensions
+    return None
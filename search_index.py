@@ -0,0 +1,101 @@
+import re
+
+# 搜索索引分片目录: 每个分片包含以同一前缀开头的词
+SEARCH_DIR = "assets/search"
+
+# 搜索脚本: 其中的STOPWORDS列表必须与下面的STOPWORDS一致
+SEARCH_SCRIPT = "assets/js/search.js"
+
+# 分片前缀长度(也是搜索词的最短长度)
+SHARD_PREFIX_LENGTH = 2
+
+# 各字段的权重
+FIELD_WEIGHTS = {
+    "title": 10,
+    "tags": 5,
+    "category": 3,
+    "description": 1,
+}
+
+# 每个游戏从描述中取的关键词数量
+DESCRIPTION_KEYWORDS = 24
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can for from has have in into is it its of on or so than that the their then
+there these this to was were will with you your yours our we they them all any each every more most over
+out up get gets just like while where when who what which how also only own same very new one two
+""".split())
+
+# 搜索脚本中的停用词列表: var STOPWORDS = toSet('...');
+SCRIPT_STOPWORDS = re.compile(r"var STOPWORDS = toSet\('([^']*)'\)")
+
+def script_stopwords(script):
+    match = SCRIPT_STOPWORDS.search(script)
+    return frozenset(match.group(1).split()) if match else None
+
+# 几乎所有游戏描述中都会出现的词, 不作为描述关键词
+DESCRIPTION_STOPWORDS = frozenset("game games play playing player players online free fun through take use".split())
+
+def tokenize(text):
+    return [token for token in TOKEN.findall(text.lower())
+            if len(token) >= SHARD_PREFIX_LENGTH and token not in STOPWORDS]
+
+# 描述关键词: 按出现顺序取前N个不重复的词
+def description_keywords(text, limit=DESCRIPTION_KEYWORDS):
+    keywords = []
+    for token in tokenize(text or ""):
+        if len(token) > 2 and token not in DESCRIPTION_STOPWORDS and token not in keywords:
+            keywords.append(token)
+            if len(keywords) >= limit:
+                break
+    return keywords
+
+class SearchIndex:
+    """Inverted index over title, tags, category and description keywords, split into prefix shards"""
+
+    def __init__(self):
+        # 文档: [详情页路径(去掉开头的games/和结尾的.html), 标题, 分类名]
+        self.docs = []
+        # 词 -> {文档编号: 分数}
+        self.postings = {}
+
+    def add(self, game):
+        doc_id = len(self.docs)
+        self.docs.append([game.detail_path[len("games/"):-len(".html")], game.title, game.category_label])
+        fields = {
+            "title": tokenize(game.title),
+            "tags": [token for tag in game.tags for token in tokenize(tag)],
+            "category": tokenize(game.category_label),
+            "description": description_keywords(game.description),
+        }
+        # 一个词出现在多个字段时取最高权重
+        scores = {}
+        for field, tokens in fields.items():
+            weight = FIELD_WEIGHTS[field]
+            for token in tokens:
+                if scores.get(token, 0) < weight:
+                    scores[token] = weight
+        for token, score in scores.items():
+            self.postings.setdefault(token, {})[doc_id] = score
+
+    def shards(self):
+        """Yield (prefix, shard) pairs; a shard holds its tokens' postings and the documents they reference"""
+        prefixes = {}
+        for token in self.postings:
+            prefixes.setdefault(token[:SHARD_PREFIX_LENGTH], []).append(token)
+        for prefix in sorted(prefixes):
+            tokens = {}
+            docs = {}
+            for token in sorted(prefixes[prefix]):
+                # 按分数从高到低排列: [[文档编号, 分数], ...]
+                # 搜索时所有词都要匹配, 不能截断, 否则靠后的游戏在常见词(例如分类名)下会被漏掉
+                postings = sorted(self.postings[token].items(), key=lambda item: (-item[1], item[0]))
+                tokens[token] = [[doc_id, score] for doc_id, score in postings]
+                for doc_id, _ in postings:
+                    docs[doc_id] = self.docs[doc_id]
+            yield prefix, {"docs": docs, "tokens": tokens}
+
+def shard_path(prefix, directory=SEARCH_DIR):
+    return f"{directory}/{prefix}.json"
@@ -0,0 +1,242 @@
+import os
+import io
+import json
+import hashlib
+import threading
+import concurrent.futures
+from collections import Counter, namedtuple
+from urllib.parse import urlparse
+
+# requests和Pillow是可选依赖, 只有启用缩略图处理时才需要
+try:
+    import requests
+except ImportError:
+    requests = None
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# 原图缓存(按内容哈希存放)和URL索引
+THUMBNAIL_CACHE_DIR = ".thumb_cache"
+
+# 生成的缩略图目录(网站的一部分)
+THUMBNAIL_DIR = "assets/thumbs"
+
+# 缩略图尺寸: 与卡片的4:3封面比例一致, 裁剪方式与CSS的object-fit: cover相同
+THUMBNAIL_SIZES = {
+    "card": (320, 240),
+    "detail": (640, 480),
+}
+
+# 输出格式: (格式名, 扩展名, Pillow格式, 编码参数); JPEG作为所有浏览器都支持的后备格式
+THUMBNAIL_FORMATS = [
+    ("avif", "avif", "AVIF", {"quality": 50}),
+    ("webp", "webp", "WEBP", {"quality": 80, "method": 6}),
+    ("jpeg", "jpg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+]
+
+# 透明图片转换为JPEG时使用的背景色(与卡片背景相同)
+BACKGROUND_COLOR = (34, 37, 47)
+
+def available():
+    return Image is not None
+
+# 当前环境中Pillow能够编码的格式(AVIF需要Pillow 11.2+或pillow-avif-plugin)
+def supported_formats():
+    Image.init()
+    return [fmt for fmt in THUMBNAIL_FORMATS if fmt[2] in Image.SAVE]
+
+# 处理结果: 各尺寸各格式的本地路径和图片的平均颜色(#rrggbb)
+Thumbnail = namedtuple("Thumbnail", ["variants", "color"])
+
+# 图片的平均颜色, 用作加载前的占位背景色
+def average_color(image):
+    red, green, blue = image.resize((1, 1), Image.BOX).getpixel((0, 0))
+    return f"#{red:02x}{green:02x}{blue:02x}"
+
+# 获取结果: data为None表示图片自上次获取后未变化
+Fetched = namedtuple("Fetched", ["data", "etag", "last_modified"])
+
+class FetchError(Exception):
+    pass
+
+# 通过HTTP获取图片, 使用ETag/Last-Modified进行条件请求
+class HttpFetcher:
+    def __init__(self, timeout=10):
+        if requests is None:
+            raise FetchError("requests is not installed (pip install requests)")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def fetch(self, url, etag=None, last_modified=None):
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise FetchError(str(e))
+        if response.status_code == 304:
+            return Fetched(None, etag, last_modified)
+        if response.status_code != 200:
+            raise FetchError(f"HTTP {response.status_code}")
+        return Fetched(response.content, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+# 从本地目录获取图片(离线构建和测试用), 目录结构为 <域名>/<URL路径>, 忽略查询参数
+class DirectoryFetcher:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path_for(self, url):
+        parsed = urlparse(url)
+        return os.path.join(self.directory, parsed.netloc, *[part for part in parsed.path.split("/") if part])
+
+    def fetch(self, url, etag=None, last_modified=None):
+        try:
+            with open(self.path_for(url), "rb") as f:
+                return Fetched(f.read(), None, None)
+        except OSError as e:
+            raise FetchError(str(e))
+
+# 处理结果统计
+PROCESSED = "processed"
+REUSED = "reused"
+FAILED = "failed"
+
+class ThumbnailPipeline:
+    """Fetch remote thumbnails, cache the originals by content hash and write resized variants.
+
+    Variant file names are derived from the source image hash, so an image is only decoded
+    and re-encoded when it is new or its content changed.
+    """
+
+    def __init__(self, fetcher, cache_dir=THUMBNAIL_CACHE_DIR, output_dir=THUMBNAIL_DIR,
+                 sizes=THUMBNAIL_SIZES, workers=8):
+        self.fetcher = fetcher
+        self.cache_dir = cache_dir
+        self.output_dir = output_dir
+        self.sizes = sizes
+        self.workers = workers
+        self.formats = supported_formats()
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.index = {}
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    self.index = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable thumbnail index {self.index_path}: {e}")
+
+    def original_path(self, digest):
+        return os.path.join(self.cache_dir, digest[:2], digest)
+
+    def variant_paths(self, digest):
+        """Site paths of every variant of the source image with this hash: {size: {format: path}}
+
+        The name also carries a hash of the variant's dimensions and encoder settings, so changing
+        THUMBNAIL_SIZES or THUMBNAIL_FORMATS produces new files instead of reusing stale ones.
+        """
+        name = digest[:16]
+        return {
+            size: {
+                fmt: f"{self.output_dir}/{name[:2]}/{name}-{size}-{settings_hash(self.sizes[size], options)}.{ext}"
+                for fmt, ext, _, options in self.formats
+            }
+            for size in self.sizes
+        }
+
+    # 获取原图, 返回(内容哈希, 原图内容或None, 索引记录)
+    def load_source(self, url, entry):
+        try:
+            fetched = self.fetcher.fetch(url, entry.get("etag"), entry.get("last_modified"))
+        except FetchError as e:
+            # 获取失败时使用上次缓存的原图
+            if entry.get("sha256") and os.path.exists(self.original_path(entry["sha256"])):
+                print(f"Using cached thumbnail for {url}: {e}")
+                return entry["sha256"], None, entry
+            raise
+        if fetched.data is None:
+            if not os.path.exists(self.original_path(entry["sha256"])):
+                # 缓存的原图已被删除, 重新完整获取
+                return self.load_source(url, {})
+            return entry["sha256"], None, entry
+        digest = hashlib.sha256(fetched.data).hexdigest()
+        original = self.original_path(digest)
+        if not os.path.exists(original):
+            write_atomic(original, fetched.data)
+        new_entry = {"sha256": digest, "etag": fetched.etag, "last_modified": fetched.last_modified}
+        # 内容未变化时沿用已计算的平均颜色
+        if entry.get("sha256") == digest and entry.get("color"):
+            new_entry["color"] = entry["color"]
+        return digest, fetched.data, new_entry
+
+    def decode(self, data):
+        image = Image.open(io.BytesIO(data))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGBA", image.size, BACKGROUND_COLOR + (255,))
+            image = Image.alpha_composite(background, image)
+        return image.convert("RGB")
+
+    def render_variants(self, image, variants):
+        for size, paths in variants.items():
+            resized = ImageOps.fit(image, self.sizes[size], Image.LANCZOS)
+            for fmt, _, pil_format, options in self.formats:
+                out = io.BytesIO()
+                resized.save(out, pil_format, **options)
+                write_atomic(paths[fmt], out.getvalue())
+
+    def process(self, url):
+        """Return (url, index entry, Thumbnail, status); the Thumbnail is None when the image is unavailable"""
+        entry = self.index.get(url, {})
+        try:
+            digest, data, entry = self.load_source(url, entry)
+            variants = self.variant_paths(digest)
+            complete = all(os.path.exists(path) for paths in variants.values() for path in paths.values())
+            if complete and entry.get("color"):
+                return url, entry, Thumbnail(variants, entry["color"]), REUSED
+            if data is None:
+                with open(self.original_path(digest), "rb") as f:
+                    data = f.read()
+            image = self.decode(data)
+            entry = dict(entry, color=average_color(image))
+            if complete:
+                return url, entry, Thumbnail(variants, entry["color"]), REUSED
+            self.render_variants(image, variants)
+            return url, entry, Thumbnail(variants, entry["color"]), PROCESSED
+        except (FetchError, OSError, ValueError) as e:
+            # Pillow无法识别的图片抛出OSError(UnidentifiedImageError)
+            print(f"Thumbnail failed for {url}: {e}")
+            return url, None, None, FAILED
+
+    def run(self, urls):
+        """Process every distinct URL; return ({url: Thumbnail}, Counter of statuses)"""
+        urls = sorted(set(url for url in urls if url))
+        thumbs = {}
+        stats = Counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for url, entry, thumbnail, status in executor.map(self.process, urls):
+                stats[status] += 1
+                if thumbnail is not None:
+                    thumbs[url] = thumbnail
+                    self.index[url] = entry
+        write_atomic(self.index_path, json.dumps(self.index, indent=2, sort_keys=True).encode("utf-8"))
+        return thumbs, stats
+
+# 缩略图尺寸和编码参数的哈希(背景色影响透明图片的输出, 也计算在内)
+def settings_hash(dimensions, options):
+    settings = json.dumps([list(dimensions), options, BACKGROUND_COLOR], sort_keys=True)
+    return hashlib.sha256(settings.encode("utf-8")).hexdigest()[:8]
+
+# 先写入临时文件再替换, 中断时不会留下不完整的文件
+def write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
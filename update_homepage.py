@@ -1,11 +1,11 @@
-import json
 import os
 import random
 
+from catalog import load_games
+
 def update_homepage():
     # 读取游戏数据
-    with open('game_data.json', 'r', encoding='utf-8') as f:
-        games = json.load(f)
+    games = load_games('game_data.json')
     
     # 随机打乱游戏顺序
     random.shuffle(games)
@@ -26,11 +26,11 @@ def update_homepage():
     game_cards_html = '\n<div class="game-grid">\n'
     
     for game in games:
-        title = game['title']
-        thumb = game['thumb']
-        category = game['category'].lower()
-        tags = game['tags']
-        description = game['description']
+        title = game.title
+        thumb = game.thumb
+        category = game.category.lower()
+        tags = game.tags
+        description = game.description
         
         # 如果描述太长，截断它
         if len(description) > 100:
@@ -39,19 +39,19 @@ def update_homepage():
         # 生成游戏卡片HTML
         game_card = f'''
     <div class="game-card">
-        <a href="games/{category}/{title.lower().replace(" ", "_").replace(":", "_").replace("'", "").replace("&", "and").replace("-", "_")}.html" class="game-cover-link">
+        <a href="{game.detail_path}" class="game-cover-link">
             <div class="game-cover-container">
                 <img class="game-cover" src="{thumb}" alt="{title}">
             </div>
         </a>
         <div class="game-info">
-            <h3><a href="games/{category}/{title.lower().replace(" ", "_").replace(":", "_").replace("'", "").replace("&", "and").replace("-", "_")}.html">{title}</a></h3>
+            <h3><a href="{game.detail_path}">{title}</a></h3>
             <div class="game-tags">{" ".join(f'<span>{tag}</span>' for tag in tags)}</div>
             <div class="game-category">
                 <span>{category}</span>
             </div>
             <p class="game-desc">{description}</p>
-            <a href="games/{category}/{title.lower().replace(" ", "_").replace(":", "_").replace("'", "").replace("&", "and").replace("-", "_")}.html" class="play-btn">Play Now</a>
+            <a href="{game.detail_path}" class="play-btn">Play Now</a>
         </div>
     </div>
     '''